@@ -0,0 +1,187 @@
+"""
+Order inbox latency before/after the (party, -created_at, -id) indexes.
+
+Builds a throwaway test database (never the configured one), fills it with
+--orders orders spread over sellers/buyers with one heavy seller and one
+heavy buyer (an agency ordering in bulk), then
+times the first and a deep page of the inbox queries OrderViewSet.list
+issues, first with the old (buyer, seller, status) index and then with the
+indexes from Order.Meta.
+
+    cd backend
+    python benchmarks/order_inbox.py --orders 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fiverrBackend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, models  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from gigs.models import Gig  # noqa: E402
+from orders.models import Order  # noqa: E402
+
+User = get_user_model()
+
+OLD_INDEXES = [models.Index(fields=["buyer", "seller", "status"], name="bench_old_buyer_seller_status")]
+PAGE_SIZE = 25
+
+
+def populate(n_orders, n_sellers, n_buyers):
+    unusable = "!"  # unusable password: skips hashing
+    User.objects.bulk_create(
+        [
+            User(username=f"seller{i}", email=f"seller{i}@example.com", password=unusable, is_seller=True)
+            for i in range(n_sellers)
+        ]
+        + [
+            User(username=f"buyer{i}", email=f"buyer{i}@example.com", password=unusable)
+            for i in range(n_buyers)
+        ],
+        batch_size=5000,
+    )
+    sellers = list(User.objects.filter(is_seller=True).values_list("pk", flat=True))
+    buyers = list(User.objects.filter(is_seller=False).values_list("pk", flat=True))
+    Gig.objects.bulk_create(
+        [
+            Gig(seller_id=pk, title=f"Gig {i}", slug=f"gig-{i}", description="d", price="10.00")
+            for i, pk in enumerate(sellers)
+        ],
+        batch_size=5000,
+    )
+    gig_for = dict(Gig.objects.values_list("seller_id", "pk"))
+
+    statuses = [choice for choice, _ in Order.STATUS_CHOICES]
+    heavy_seller = sellers[0]
+    heavy_buyer = buyers[0]
+    start = timezone.now() - timedelta(days=365)
+    table = Order._meta.db_table
+    columns = ["buyer_id", "seller_id", "gig_id", "price", "status", "instructions", "created_at", "updated_at"]
+    sql = (
+        f"INSERT INTO {connection.ops.quote_name(table)} "
+        f"({', '.join(connection.ops.quote_name(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    rng = random.Random(42)
+    chunk = []
+    with connection.cursor() as cursor:
+        for i in range(n_orders):
+            # 10% of all orders go to one seller: the inbox that hurts
+            seller = heavy_seller if rng.random() < 0.1 else rng.choice(sellers)
+            # and 2% come from one buyer; everyone else has a handful
+            buyer = heavy_buyer if rng.random() < 0.02 else rng.choice(buyers)
+            created = start + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            chunk.append(
+                (buyer, seller, gig_for[seller], "10.00", rng.choice(statuses), "", created, created)
+            )
+            if len(chunk) == 10000:
+                cursor.executemany(sql, chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(sql, chunk)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    elif connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(table)}")
+    return heavy_seller, heavy_buyer, buyers[1]
+
+
+def set_indexes(drop, add):
+    with connection.schema_editor() as editor:
+        for index in drop:
+            editor.remove_index(Order, index)
+        for index in add:
+            editor.add_index(Order, index)
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+def inbox_queries(seller_id, heavy_buyer_id, buyer_id):
+    ordering = ("-created_at", "-id")
+    seller_inbox = Order.objects.filter(seller_id=seller_id).order_by(*ordering)
+    buyer_inbox = Order.objects.filter(buyer_id=buyer_id).order_by(*ordering)
+    heavy_buyer_inbox = Order.objects.filter(buyer_id=heavy_buyer_id).order_by(*ordering)
+    pending = seller_inbox.filter(status=Order.STATUS_PENDING)
+    # A deep page, as the keyset paginator asks for it: seek past a cursor position
+    cursor_row = seller_inbox.values("created_at", "id")[PAGE_SIZE * 40]
+    deep = seller_inbox.filter(
+        models.Q(created_at__lt=cursor_row["created_at"])
+        | models.Q(created_at=cursor_row["created_at"], id__lt=cursor_row["id"])
+    )
+    return {
+        "seller inbox, first page": seller_inbox,
+        "seller inbox, page 40": deep,
+        "seller inbox, ?status=pending": pending,
+        "buyer inbox, first page": buyer_inbox,
+        "heavy buyer inbox, first page": heavy_buyer_inbox,
+    }
+
+
+def time_query(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset[:PAGE_SIZE].values_list("id", flat=True))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def run(label, queries, repeat, explain):
+    print(f"\n== {label}")
+    results = {}
+    for name, queryset in queries.items():
+        results[name] = time_query(queryset, repeat)
+        print(f"{name:<34} {results[name]:9.2f} ms")
+        if explain:
+            for line in queryset[:PAGE_SIZE].explain().splitlines():
+                print(f"    {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--sellers", type=int, default=1000)
+    parser.add_argument("--buyers", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--explain", action="store_true", help="Print query plans.")
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        started = time.perf_counter()
+        parties = populate(args.orders, args.sellers, args.buyers)
+        print(f"Loaded {args.orders} orders in {time.perf_counter() - started:.1f}s ({connection.vendor})")
+        queries = inbox_queries(*parties)
+
+        new_indexes = list(Order._meta.indexes)
+        set_indexes(drop=new_indexes, add=OLD_INDEXES)
+        before = run("before: (buyer, seller, status)", queries, args.repeat, args.explain)
+        set_indexes(drop=OLD_INDEXES, add=new_indexes)
+        after = run("after: (seller|buyer, [status,] -created_at, -id)", queries, args.repeat, args.explain)
+
+        print("\n== speedup")
+        for name in queries:
+            print(f"{name:<34} {before[name] / max(after[name], 1e-6):8.1f}x")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Order placement throughput under concurrent buyers.
+
+Builds a throwaway file-backed test database (never the configured one)
+with --gigs gigs and --buyers buyers, then has every buyer place --orders
+orders through POST /api/orders/ from its own thread, as the frontend
+does (Idempotency-Key header included). Reports the queries one placement
+issues, throughput and latency percentiles.
+
+SQLite serialises writers, so the test database is opened with
+IMMEDIATE transactions and a generous busy timeout; on PostgreSQL the
+numbers reflect row-level concurrency instead.
+
+    cd backend
+    python benchmarks/order_placement.py --buyers 8 --orders 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fiverrBackend.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test.utils import CaptureQueriesContext, setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from gigs.models import Gig  # noqa: E402
+from orders.models import Order  # noqa: E402
+
+User = get_user_model()
+
+URL = "/api/orders/"
+
+
+def populate(n_gigs, n_buyers):
+    unusable = "!"  # unusable password: skips hashing
+    sellers = User.objects.bulk_create(
+        [
+            User(username=f"seller{i}", email=f"seller{i}@example.com", password=unusable, is_seller=True)
+            for i in range(n_gigs)
+        ]
+    )
+    Gig.objects.bulk_create(
+        [
+            Gig(seller=seller, title=f"Gig {i}", slug=f"gig-{i}", description="d", price="10.00")
+            for i, seller in enumerate(sellers)
+        ]
+    )
+    User.objects.bulk_create(
+        [User(username=f"buyer{i}", email=f"buyer{i}@example.com", password=unusable) for i in range(n_buyers)]
+    )
+    gigs = list(Gig.objects.values_list("pk", flat=True))
+    buyers = list(User.objects.filter(is_seller=False))
+    return gigs, buyers
+
+
+def place(client, gig_id):
+    return client.post(
+        URL, {"gig_id": gig_id, "instructions": ""}, format="json",
+        HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()),
+    )
+
+
+def buyer_loop(buyer, gigs, n_orders, latencies, errors, start):
+    client = APIClient()
+    client.force_authenticate(buyer)
+    start.wait()
+    try:
+        for i in range(n_orders):
+            started = time.perf_counter()
+            response = place(client, gigs[(buyer.pk + i) % len(gigs)])
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 201:
+                errors.append(response.status_code)
+    finally:
+        connections.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=8, help="Concurrent buyers (one thread each).")
+    parser.add_argument("--orders", type=int, default=200, help="Orders placed by each buyer.")
+    parser.add_argument("--gigs", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings_dict = connection.settings_dict
+    old_name = settings_dict["NAME"]
+    if connection.vendor == "sqlite":
+        # Threads need a shared on-disk database, not per-connection memory
+        settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "bench_orders.sqlite3")
+        settings_dict["OPTIONS"].update(transaction_mode="IMMEDIATE", timeout=60)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        gigs, buyers = populate(args.gigs, args.buyers)
+
+        client = APIClient()
+        client.force_authenticate(buyers[0])
+        with CaptureQueriesContext(connection) as queries:
+            place(client, gigs[0])
+        reads = sum(1 for q in queries.captured_queries if q["sql"].startswith("SELECT"))
+        print(f"One placement: {len(queries)} queries ({reads} reads) on {connection.vendor}")
+        connection.close()
+
+        latencies, errors = [], []
+        start = threading.Barrier(len(buyers) + 1)
+        threads = [
+            threading.Thread(target=buyer_loop, args=(buyer, gigs, args.orders, latencies, errors, start))
+            for buyer in buyers
+        ]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        placed = Order.objects.count() - 1
+        latencies.sort()
+        print(f"{len(buyers)} buyers x {args.orders} orders: {placed} placed in {elapsed:.1f}s "
+              f"({placed / elapsed:.0f} orders/s), {len(errors)} failed")
+        print(f"latency p50 {statistics.median(latencies):.1f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f} ms, max {latencies[-1]:.1f} ms")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
 from django.contrib import admin
-from .models import Conversation, Message
+from .models import Conversation, ConversationParticipant, Message
+
+
+class ConversationParticipantInline(admin.TabularInline):
+    model = ConversationParticipant
+    raw_id_fields = ("user", "last_read_message")
+    extra = 0
+
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
     list_display = ("id", "subject", "created_at", "updated_at")
-    filter_horizontal = ("participants",)
+    raw_id_fields = ("last_message", "last_message_sender")
+    inlines = [ConversationParticipantInline]
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
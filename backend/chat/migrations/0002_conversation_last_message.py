@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def backfill_last_message(apps, schema_editor):
+    Conversation = apps.get_model("chat", "Conversation")
+    Message = apps.get_model("chat", "Message")
+    latest = Message.objects.filter(conversation=OuterRef("pk")).order_by("-created_at", "-id")
+    Conversation.objects.update(
+        last_message=Subquery(latest.values("pk")[:1]),
+        last_message_preview=Coalesce(
+            Subquery(latest.annotate(preview=Substr("content", 1, 200)).values("preview")[:1]),
+            Value(""),
+        ),
+        last_message_sender=Subquery(latest.values("sender")[:1]),
+        last_message_at=Subquery(latest.values("created_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_last_message, migrations.RunPython.noop),
+    ]
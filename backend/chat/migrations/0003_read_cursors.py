@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_read_cursors(apps, schema_editor):
+    """
+    Is_read was one flag shared by everybody. Each participant's cursor
+    becomes the newest message before the first message from someone else
+    that is still unread (or the newest message, if none is).
+    """
+    ConversationParticipant = apps.get_model("chat", "ConversationParticipant")
+    Message = apps.get_model("chat", "Message")
+    memberships = ConversationParticipant.objects.values_list("pk", "conversation_id", "user_id")
+    for pk, conversation_id, user_id in memberships.iterator(chunk_size=2000):
+        messages = Message.objects.filter(conversation_id=conversation_id)
+        first_unread = (
+            messages.filter(is_read=False).exclude(sender_id=user_id)
+            .order_by("id").values_list("id", flat=True).first()
+        )
+        if first_unread is not None:
+            messages = messages.filter(id__lt=first_unread)
+        cursor = messages.order_by("-id").values_list("id", flat=True).first()
+        if cursor is not None:
+            ConversationParticipant.objects.filter(pk=pk).update(last_read_message_id=cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_conversation_last_message'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The implicit many-to-many table becomes the explicit membership
+        # model: same table, columns and unique index, so only state changes
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ConversationParticipant',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='chat.conversation')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_memberships', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'chat_conversation_participants',
+                        'unique_together': {('conversation', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='conversation',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='conversations', through='chat.ConversationParticipant', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.RunPython(backfill_read_cursors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'id'], name='chat_messag_convers_0a488e_idx'),
+        ),
+    ]
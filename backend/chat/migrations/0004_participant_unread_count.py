@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_unread_counts(apps, schema_editor):
+    ConversationParticipant = apps.get_model("chat", "ConversationParticipant")
+    Message = apps.get_model("chat", "Message")
+    unread = (
+        Message.objects.filter(
+            conversation=OuterRef("conversation_id"),
+            id__gt=Coalesce(OuterRef("last_read_message_id"), Value(0)),
+        )
+        .exclude(sender=OuterRef("user_id"))
+        .order_by()
+        .values("conversation")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    ConversationParticipant.objects.update(unread_count=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_read_cursors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:50
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_participant_keys(apps, schema_editor):
+    """
+    Key every conversation by its participant set. Where older duplicates
+    share a set, the most recently updated active one becomes canonical;
+    the others keep their messages but get no key, so are never reused.
+    """
+    Conversation = apps.get_model("chat", "Conversation")
+    ConversationParticipant = apps.get_model("chat", "ConversationParticipant")
+    members = {}
+    memberships = ConversationParticipant.objects.values_list("conversation_id", "user_id")
+    for conversation_id, user_id in memberships.iterator(chunk_size=2000):
+        members.setdefault(conversation_id, []).append(user_id)
+
+    claimed = set()
+    conversations = Conversation.objects.order_by("-is_active", "-updated_at", "-id").values_list("pk", "is_active")
+    for pk, is_active in conversations.iterator(chunk_size=2000):
+        if pk not in members:
+            continue
+        canonical = ",".join(str(user_id) for user_id in sorted(set(members[pk])))
+        key = hashlib.sha256(canonical.encode()).hexdigest()
+        if is_active:
+            if key in claimed:
+                continue
+            claimed.add(key)
+        Conversation.objects.filter(pk=pk).update(participant_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_participant_unread_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='participant_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_participant_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('participant_key',), name='unique_active_participant_set'),
+        ),
+    ]
@@ -1,5 +1,12 @@
-from django.db import models
+import hashlib
+
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+PREVIEW_LENGTH = 200
 
 
 class Conversation(models.Model):
@@ -9,15 +16,84 @@ class Conversation(models.Model):
     """
     participants = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
+        through="ConversationParticipant",
         related_name="conversations",
     )
     subject = models.CharField(max_length=255, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Newest message, denormalized so the inbox renders without touching messages
+    last_message = models.ForeignKey(
+        "Message", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default="")
+    last_message_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    # Hash of the sorted participant ids: an active conversation per participant set
+    participant_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ("-updated_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["participant_key"],
+                condition=models.Q(is_active=True),
+                name="unique_active_participant_set",
+            ),
+        ]
+
+    @staticmethod
+    def key_for(user_ids):
+        canonical = ",".join(str(user_id) for user_id in sorted(set(user_ids)))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @classmethod
+    def get_or_create_for(cls, user_ids, subject=None):
+        """
+        The active conversation between exactly ``user_ids``, created if
+        missing: one indexed lookup plus at most one insert. A concurrent
+        creator that wins the unique index is picked up instead.
+        Returns (conversation, created).
+        """
+        key = cls.key_for(user_ids)
+        existing = cls.objects.filter(participant_key=key, is_active=True).first()
+        if existing is not None:
+            return existing, False
+        try:
+            with transaction.atomic():
+                conversation = cls.objects.create(subject=subject, participant_key=key)
+                ConversationParticipant.objects.bulk_create(
+                    ConversationParticipant(conversation=conversation, user_id=user_id)
+                    for user_id in set(user_ids)
+                )
+        except IntegrityError:
+            return cls.objects.get(participant_key=key, is_active=True), False
+        return conversation, True
+
+    def record_message(self, message):
+        """
+        Point the conversation at ``message`` (and bump updated_at) and count
+        it as unread for everybody but the sender: one UPDATE each. Call it in
+        the transaction that created the message.
+        """
+        self.last_message = message
+        self.last_message_preview = message.content[:PREVIEW_LENGTH]
+        self.last_message_sender = message.sender
+        self.last_message_at = message.created_at
+        self.updated_at = timezone.now()
+        Conversation.objects.filter(pk=self.pk).update(
+            last_message=message,
+            last_message_preview=self.last_message_preview,
+            last_message_sender=message.sender,
+            last_message_at=message.created_at,
+            updated_at=self.updated_at,
+        )
+        ConversationParticipant.objects.filter(conversation=self).exclude(user=message.sender).update(
+            unread_count=models.F("unread_count") + 1
+        )
 
     def __str__(self):
         pks = ",".join(str(p.pk) for p in self.participants.all()[:4])
@@ -32,11 +108,81 @@ class Message(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sent_messages"
     )
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ("created_at",)
+        # Unread counts are range counts past a participant's read cursor
+        indexes = [models.Index(fields=["conversation", "id"])]
 
     def __str__(self):
         return f"Message {self.pk} in conv {self.conversation_id} by {self.sender_id}"
+
+
+class ConversationParticipant(models.Model):
+    """
+    Membership of a user in a conversation, with their read cursor: every
+    message with a higher id than ``last_read_message`` (not sent by the
+    user) is unread for them.
+    """
+
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name="memberships"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="conversation_memberships"
+    )
+    last_read_message = models.ForeignKey(
+        Message, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    # Messages from others past the cursor, kept in step by send_message and mark_read
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # The table the implicit many-to-many used to create
+        db_table = "chat_conversation_participants"
+        unique_together = [("conversation", "user")]
+
+    @staticmethod
+    def counted_unread():
+        """Expression recounting ``unread_count`` from the cursor, for annotate()/update()."""
+        unread = (
+            Message.objects.filter(
+                conversation=models.OuterRef("conversation_id"),
+                id__gt=Coalesce(models.OuterRef("last_read_message_id"), models.Value(0)),
+            )
+            .exclude(sender=models.OuterRef("user_id"))
+            .order_by()
+            .values("conversation")
+            .annotate(n=models.Count("id"))
+            .values("n")
+        )
+        return Coalesce(models.Subquery(unread), 0)
+
+    def unread_messages(self):
+        """Messages from others past the cursor: a range on (conversation, id)."""
+        messages = Message.objects.filter(conversation_id=self.conversation_id).exclude(sender_id=self.user_id)
+        if self.last_read_message_id is not None:
+            messages = messages.filter(id__gt=self.last_read_message_id)
+        return messages
+
+    def mark_read(self, message_id):
+        """
+        Move the cursor forward to ``message_id`` and zero ``unread_count``
+        with one single-row UPDATE. Zero is only right when ``message_id``
+        is the conversation's latest message, and the caller must already
+        hold this row's lock (select_for_update, as the mark_read view does)
+        so a concurrent send can't slip in between reading the count and
+        zeroing it.
+        """
+        moved = (
+            ConversationParticipant.objects.filter(pk=self.pk)
+            .filter(models.Q(last_read_message__isnull=True) | models.Q(last_read_message_id__lt=message_id))
+            .update(last_read_message_id=message_id, unread_count=0)
+        )
+        if moved:
+            self.last_read_message_id, self.unread_count = message_id, 0
+        return bool(moved)
+
+    def __str__(self):
+        return f"{self.user_id} in conv {self.conversation_id} (read to {self.last_read_message_id})"
@@ -0,0 +1,151 @@
+"""
+Push delivery of chat events over WebSockets.
+
+``websocket_application`` is a plain ASGI app mounted by fiverrBackend.asgi
+at ``/ws/chat/?token=<SimpleJWT access token>``. Each connection subscribes
+to the authenticated user's feed; views publish events addressed to the
+participants of a conversation once their transaction commits:
+
+    {"type": "message.created", "conversation": 7, "message": {...}}
+    {"type": "conversation.read", "conversation": 7, "user": 3, "marked": 2}
+
+Fan-out goes through the broker named by ``settings.CHAT_BROKER``.
+InMemoryBroker reaches sockets served by the same process (single node,
+tests); a multi-node deployment plugs in a broker with the same
+``subscribe``/``unsubscribe``/``publish`` methods backed by a shared bus.
+"""
+import asyncio
+import functools
+import json
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+WEBSOCKET_PATH = "/ws/chat/"
+# Close codes in the application range (4000-4999)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+
+class InMemoryBroker:
+    """
+    Per-process fan-out. Subscribers are asyncio queues owned by the event
+    loop serving the socket; publish() may be called from any thread (sync
+    views run in a worker thread) and hands events over thread-safely.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [entry for user_id in set(user_ids) for entry in self._subscribers.get(user_id, ())]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The socket's loop has shut down; it unsubscribes on its way out
+                pass
+
+
+def _offer(queue, event):
+    if queue.full():
+        # A consumer that stopped reading loses its oldest events, not the publisher's time
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, "CHAT_BROKER", "chat.realtime.InMemoryBroker"))()
+
+
+def publish_on_commit(user_ids, event):
+    """Deliver ``event`` to ``user_ids`` after the current transaction commits."""
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: get_broker().publish(user_ids, event))
+
+
+def _authenticate(raw_token):
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+async def websocket_application(scope, receive, send):
+    if scope["path"].rstrip("/") + "/" != WEBSOCKET_PATH:
+        await receive()  # websocket.connect
+        await send({"type": "websocket.close", "code": CLOSE_NOT_FOUND})
+        return
+
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    token = parse_qs(scope.get("query_string", b"").decode()).get("token", [""])[0]
+    user = await sync_to_async(_authenticate)(token) if token else None
+    if user is None:
+        await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+        return
+
+    broker = get_broker()
+    queue = broker.subscribe(user.pk)
+    await send({"type": "websocket.accept"})
+    try:
+        await _pump(receive, send, queue)
+    finally:
+        broker.unsubscribe(user.pk, queue)
+
+
+async def _pump(receive, send, queue):
+    incoming = asyncio.ensure_future(receive())
+    outgoing = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED)
+            if outgoing in done:
+                event = outgoing.result()
+                await send({"type": "websocket.send", "text": json.dumps(event, cls=DjangoJSONEncoder)})
+                outgoing = asyncio.ensure_future(queue.get())
+            if incoming in done:
+                message = incoming.result()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if _is_ping(message):
+                    await send({"type": "websocket.send", "text": json.dumps({"type": "pong"})})
+                incoming = asyncio.ensure_future(receive())
+    finally:
+        incoming.cancel()
+        outgoing.cancel()
+
+
+def _is_ping(message):
+    try:
+        return json.loads(message.get("text") or "{}").get("type") == "ping"
+    except (ValueError, AttributeError):
+        return False
@@ -17,7 +17,7 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
-        fields = ("id", "conversation", "sender", "content", "is_read", "created_at")
+        fields = ("id", "conversation", "sender", "content", "created_at")
         read_only_fields = ("id", "sender", "created_at")
 
     def validate_content(self, value):
@@ -50,17 +50,34 @@ class ConversationListSerializer(serializers.ModelSerializer):
         fields = ("id", "subject", "participants", "last_message", "updated_at", "created_at")
 
     def get_last_message(self, obj):
-        last = obj.messages.order_by("-created_at").first()
-        if not last:
+        # Denormalized on the conversation by send_message; content is the preview
+        if obj.last_message_id is None:
             return None
+        sender = obj.last_message_sender
         return {
-            "id": last.id,
-            "content": last.content,
-            "sender": {"id": last.sender.id, "username": last.sender.username},
-            "created_at": last.created_at,
-            "is_read": last.is_read,
+            "id": obj.last_message_id,
+            "content": obj.last_message_preview,
+            "sender": {"id": sender.id, "username": sender.username} if sender else None,
+            "created_at": obj.last_message_at,
+            "is_read": self._is_read(obj),
         }
 
+    def _is_read(self, obj):
+        """Whether the requesting user has read the last message (their own always are)."""
+        request = self.context.get("request")
+        if request is None:
+            return None
+        if obj.last_message_sender_id == request.user.id:
+            return True
+        if hasattr(obj, "last_read_message_id"):
+            cursor = obj.last_read_message_id
+        else:
+            cursor = (
+                obj.memberships.filter(user=request.user)
+                .values_list("last_read_message_id", flat=True).first()
+            )
+        return cursor is not None and cursor >= obj.last_message_id
+
 
 class ConversationDetailSerializer(serializers.ModelSerializer):
     participants = UserBriefSerializer(many=True, read_only=True)
@@ -1,3 +1,255 @@
+import asyncio
+import json
+
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import PREVIEW_LENGTH, Conversation, ConversationParticipant
+from .realtime import CLOSE_UNAUTHORIZED, websocket_application
+from notifications.badges import get_badges
+
+User = get_user_model()
+
+
+class Socket:
+    """Drives websocket_application in-process, the way an ASGI server would."""
+
+    def __init__(self, query_string=b"", path="/ws/chat/"):
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        scope = {"type": "websocket", "path": path, "query_string": query_string}
+        self.task = asyncio.ensure_future(
+            websocket_application(scope, self.incoming.get, self.outgoing.put)
+        )
+
+    async def connect(self):
+        await self.incoming.put({"type": "websocket.connect"})
+        return await self.receive()
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outgoing.get(), timeout=2)
+
+    async def receive_json(self):
+        message = await self.receive()
+        return json.loads(message["text"])
+
+    async def close(self):
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, timeout=2)
+
+
+class ConversationInboxTestCase(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email="alice@example.com", username="alice", password="pass1234"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+        self.conversations = []
+        for i in range(5):
+            other = User.objects.create_user(
+                email=f"user{i}@example.com", username=f"user{i}", password="pass1234"
+            )
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.alice, other)
+            self.conversations.append(conversation)
+
+    def send(self, conversation, content):
+        url = reverse("conversation-send-message", kwargs={"pk": conversation.pk})
+        return self.client.post(url, {"content": content}, format="json")
+
+    def test_send_message_moves_the_pointer(self):
+        conversation = self.conversations[0]
+        self.send(conversation, "first")
+        long_text = "x" * (PREVIEW_LENGTH + 50)
+        message_id = self.send(conversation, long_text).data["id"]
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message_id, message_id)
+        self.assertEqual(conversation.last_message_preview, long_text[:PREVIEW_LENGTH])
+        self.assertEqual(conversation.last_message_sender, self.alice)
+
+    def test_inbox_query_count_does_not_grow_with_conversations(self):
+        for conversation in self.conversations:
+            self.send(conversation, f"hello {conversation.pk}")
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("conversation-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = response.data["results"] if "results" in response.data else response.data
+        self.assertEqual(len(rows), 5)
+        newest = rows[0]
+        self.assertEqual(newest["id"], self.conversations[-1].pk)
+        self.assertEqual(newest["last_message"]["content"], f"hello {self.conversations[-1].pk}")
+        self.assertEqual(newest["last_message"]["sender"], {"id": self.alice.id, "username": "alice"})
+        # Alice sent it herself
+        self.assertTrue(newest["last_message"]["is_read"])
+
+
+class ConversationCreateTestCase(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(email=f"{name}@example.com", username=name, password="pass1234")
+            for name in ("alice", "bob", "carol")
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def create(self, *users):
+        data = {"participants": [user.pk for user in users]}
+        return self.client.post(reverse("conversation-list"), data, format="json")
+
+    def test_same_participants_reuse_the_conversation(self):
+        first = self.create(self.bob)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(4):
+            # user check, keyed lookup, then participants and messages for the response
+            again = self.client.post(
+                reverse("conversation-list"), {"participants": f"{self.bob.pk}"}, format="json"
+            )
+        self.assertEqual(again.data["id"], first.data["id"])
+        # A different set is a different conversation
+        group = self.create(self.bob, self.carol)
+        self.assertNotEqual(group.data["id"], first.data["id"])
+        conversation = Conversation.objects.get(pk=first.data["id"])
+        self.assertEqual(conversation.participant_key, Conversation.key_for([self.bob.pk, self.alice.pk]))
+
+    def test_concurrent_create_returns_the_winner(self):
+        # Another request creates the conversation between our lookup and insert
+        winner = Conversation.objects.create(participant_key=Conversation.key_for([self.alice.pk, self.bob.pk]))
+        winner.participants.add(self.alice, self.bob)
+        real_filter = Conversation.objects.filter
+
+        def stale_filter(*args, **kwargs):
+            if "participant_key" in kwargs:
+                return Conversation.objects.none()
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(Conversation.objects, "filter", side_effect=stale_filter):
+            response = self.create(self.bob)
+        self.assertEqual(response.data["id"], winner.pk)
+        self.assertEqual(Conversation.objects.count(), 1)
+        self.assertEqual(ConversationParticipant.objects.count(), 2)
+
+    def test_unknown_participant_is_rejected(self):
+        response = self.client.post(reverse("conversation-list"), {"participants": [999]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse("conversation-list"), {"participants": ["bob"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Conversation.objects.exists())
+
+
+class ReadCursorTestCase(TestCase):
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(email=f"{name}@example.com", username=name, password="pass1234")
+            for name in ("alice", "bob", "carol")
+        ]
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob, self.carol)
+
+    def as_user(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def send(self, user, content):
+        url = reverse("conversation-send-message", kwargs={"pk": self.conversation.pk})
+        return self.as_user(user).post(url, {"content": content}, format="json")
+
+    def unread(self, user):
+        response = self.as_user(user).get(reverse("conversation-unread-count"))
+        return response.data["total_unread"], response.data["conversations"][0]["unread"]
+
+    def test_each_participant_has_their_own_cursor(self):
+        self.send(self.alice, "one")
+        self.send(self.alice, "two")
+        self.send(self.bob, "three")
+        self.assertEqual(self.unread(self.carol), (3, 3))
+        self.assertEqual(self.unread(self.bob), (2, 2))
+
+        url = reverse("conversation-mark-read", kwargs={"pk": self.conversation.pk})
+        with self.assertNumQueries(9):
+            # conversation, permission check, savepoint, locked membership, last message id,
+            # cursor update, badge decrement, participants for the read receipt, release
+            response = self.as_user(self.carol).post(url)
+        self.assertEqual(response.data["marked"], 3)
+        self.assertEqual(self.unread(self.carol), (0, 0))
+        # Bob's cursor did not move
+        self.assertEqual(self.unread(self.bob), (2, 2))
+        # Marking again is a no-op
+        self.assertEqual(self.as_user(self.carol).post(url).data["marked"], 0)
+
+        self.send(self.bob, "four")
+        self.assertEqual(self.unread(self.carol), (1, 1))
+        self.assertEqual(get_badges(self.carol.id)["unread_messages"], 1)
+        self.assertEqual(get_badges(self.alice.id)["unread_messages"], 2)
+        inbox = self.as_user(self.carol).get(reverse("conversation-list")).data
+        rows = inbox["results"] if "results" in inbox else inbox
+        self.assertFalse(rows[0]["last_message"]["is_read"])
+
+
+class ChatRealtimeTestCase(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            email="alice@example.com", username="alice", password="pass1234"
+        )
+        self.bob = User.objects.create_user(
+            email="bob@example.com", username="bob", password="pass1234"
+        )
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.alice, self.bob)
+
+    def token(self, user):
+        return f"token={AccessToken.for_user(user)}".encode()
+
+    def post(self, user, action, data=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse(f"conversation-{action}", kwargs={"pk": self.conversation.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(url, data or {}, format="json")
+
+    async def test_message_and_read_receipt_are_pushed(self):
+        socket = Socket(await sync_to_async(self.token)(self.bob))
+        self.assertEqual((await socket.connect())["type"], "websocket.accept")
+
+        response = await sync_to_async(self.post)(self.alice, "send-message", {"content": "hi"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        event = await socket.receive_json()
+        self.assertEqual(event["type"], "message.created")
+        self.assertEqual(event["conversation"], self.conversation.pk)
+        self.assertEqual(event["message"]["content"], "hi")
+        self.assertEqual(event["message"]["sender"]["username"], "alice")
+
+        await sync_to_async(self.post)(self.bob, "mark-read")
+        event = await socket.receive_json()
+        self.assertEqual(
+            (event["type"], event["user"], event["marked"]), ("conversation.read", self.bob.pk, 1)
+        )
+
+        await socket.incoming.put({"type": "websocket.receive", "text": '{"type": "ping"}'})
+        self.assertEqual((await socket.receive_json())["type"], "pong")
+        await socket.close()
+
+    async def test_outsiders_receive_nothing(self):
+        carol = await sync_to_async(User.objects.create_user)(
+            email="carol@example.com", username="carol", password="pass1234"
+        )
+        socket = Socket(await sync_to_async(self.token)(carol))
+        await socket.connect()
+        await sync_to_async(self.post)(self.alice, "send-message", {"content": "private"})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(socket.outgoing.get(), timeout=0.2)
+        await socket.close()
 
-# Create your tests here.
+    async def test_invalid_token_is_refused(self):
+        socket = Socket(b"token=not-a-jwt")
+        message = await socket.connect()
+        self.assertEqual(message, {"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+        await asyncio.wait_for(socket.task, timeout=2)
@@ -3,16 +3,23 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.throttling import UserRateThrottle
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
 
-from .models import Conversation, Message
+from .models import Conversation, ConversationParticipant, Message
 from .serializers import (
     ConversationListSerializer,
     ConversationDetailSerializer,
     MessageSerializer,
 )
 from .permissions import IsParticipant
+from .realtime import publish_on_commit
+from notifications.badges import adjust as adjust_badges
+
+User = get_user_model()
 
 
 class MessageThrottle(UserRateThrottle):
@@ -20,7 +27,7 @@ class MessageThrottle(UserRateThrottle):
 
 
 class ConversationViewSet(viewsets.ModelViewSet):
-    queryset = Conversation.objects.all().prefetch_related("participants", "messages")
+    queryset = Conversation.objects.all()
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["updated_at", "created_at"]
 
@@ -42,39 +49,39 @@ class ConversationViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_anonymous:
             return Conversation.objects.none()
-        return Conversation.objects.filter(participants=user, is_active=True)
+        qs = Conversation.objects.filter(participants=user, is_active=True)
+        if self.action == "list":
+            # Inbox rows come from the denormalized last_message_* columns:
+            # one query for the page plus one participants prefetch
+            my_cursor = ConversationParticipant.objects.filter(conversation=OuterRef("pk"), user=user)
+            qs = (
+                qs.select_related("last_message_sender")
+                .annotate(last_read_message_id=Subquery(my_cursor.values("last_read_message")[:1]))
+                .prefetch_related("participants")
+            )
+        return qs
 
     def perform_create(self, serializer):
         request = self.request
         participants = request.data.get("participants", [])
         if isinstance(participants, str):
-            participants = [int(x.strip()) for x in participants.split(",") if x.strip()]
+            participants = [x.strip() for x in participants.split(",") if x.strip()]
         if not isinstance(participants, (list, tuple)):
             participants = []
+        try:
+            participants = [int(x) for x in participants]
+        except (TypeError, ValueError):
+            raise ValidationError({"participants": "Participants must be user ids."})
 
         # Always include request.user
         all_ids = set(participants + [request.user.id])
+        if User.objects.filter(pk__in=all_ids).count() != len(all_ids):
+            raise ValidationError({"participants": "Unknown user id."})
 
-        # Check if conversation already exists with same participants
-        existing = (
-            Conversation.objects.filter(participants__in=all_ids, is_active=True)
-            .annotate(count=Count("participants"))
-            .filter(count=len(all_ids))
-            .distinct()
-        )
-        for conv in existing:
-            ids = set(conv.participants.values_list("id", flat=True))
-            if ids == all_ids:
-                return conv  # return existing conversation
-
-        # Otherwise create new
-        conv = Conversation.objects.create(subject=request.data.get("subject"))
-        for uid in all_ids:
-            conv.participants.add(uid)
-        conv.save()
+        # Reuse the conversation with exactly these participants, if any
+        conv, _ = Conversation.get_or_create_for(all_ids, subject=request.data.get("subject"))
         return conv
 
-
     def create(self, request, *args, **kwargs):
         conv = self.perform_create(None)
         serializer = ConversationDetailSerializer(conv, context={"request": request})
@@ -88,23 +95,53 @@ class ConversationViewSet(viewsets.ModelViewSet):
         data["conversation"] = conv.id
         serializer = MessageSerializer(data=data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        msg = serializer.save()
-        # update conversation timestamp
-        conv.save()
-        return Response(MessageSerializer(msg, context={"request": request}).data, status=status.HTTP_201_CREATED)
+        participant_ids = list(conv.participants.values_list("id", flat=True))
+        with transaction.atomic():
+            msg = serializer.save()
+            # last-message pointer, preview, updated_at and per-member unread counts
+            conv.record_message(msg)
+            adjust_badges("unread_messages", {uid: 1 for uid in participant_ids if uid != request.user.id})
+            data = MessageSerializer(msg, context={"request": request}).data
+            # Pushed to every participant's socket (the sender's other tabs included)
+            publish_on_commit(
+                participant_ids,
+                {"type": "message.created", "conversation": conv.id, "message": data},
+            )
+        return Response(data, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
         """
-        Mark all messages in this conversation as read for the requesting user
-        (only marks messages not sent by the request.user).
+        Mark everything in this conversation as read for the requesting user
+        by moving their read cursor to the newest message (one row update).
         """
-        conv = self.get_object()
-        # ensure participant
-        self.check_object_permissions(request, conv)
-        msgs = conv.messages.filter(is_read=False).exclude(sender=request.user)
-        updated = msgs.update(is_read=True)
-        return Response({"marked": updated}, status=status.HTTP_200_OK)
+        conv = self.get_object()  # participants only (IsParticipant)
+        marked = 0
+        with transaction.atomic():
+            membership = get_object_or_404(
+                ConversationParticipant.objects.select_for_update(), conversation=conv, user=request.user
+            )
+            # Re-read under the lock: a send that committed meanwhile is in unread_count
+            last_id = Conversation.objects.values_list("last_message_id", flat=True).get(pk=conv.pk)
+            unread = membership.unread_count
+            if last_id is not None and membership.mark_read(last_id):
+                marked = unread
+                adjust_badges("unread_messages", {request.user.id: -marked})
+                # Read receipt for the other participants (and the reader's other tabs)
+                publish_on_commit(
+                    conv.participants.values_list("id", flat=True),
+                    {
+                        "type": "conversation.read",
+                        "conversation": conv.id,
+                        "user": request.user.id,
+                        "last_read_message": last_id,
+                        "marked": marked,
+                    },
+                )
+        return Response(
+            {"marked": marked, "last_read_message": membership.last_read_message_id},
+            status=status.HTTP_200_OK,
+        )
 
     @action(detail=False, methods=["get"])
     def unread_count(self, request):
@@ -115,16 +152,18 @@ class ConversationViewSet(viewsets.ModelViewSet):
         user = request.user
         if user.is_anonymous:
             return Response({"total_unread": 0, "conversations": []})
-        # total unread across conversations where user is participant and sender != user
-        total_unread = Message.objects.filter(conversation__participants=user, is_read=False).exclude(sender=user).count()
-        # per-conversation counts
-        conv_counts = (
-            Conversation.objects.filter(participants=user)
-            .annotate(unread=Count("messages", filter=Q(messages__is_read=False) & ~Q(messages__sender=user)))
-            .values("id", "subject", "unread", "updated_at")
-            .order_by("-updated_at")
+        # Maintained per membership by send_message/mark_read: no message scan
+        rows = (
+            ConversationParticipant.objects.filter(user=user)
+            .values_list("conversation_id", "conversation__subject", "unread_count", "conversation__updated_at")
+            .order_by("-conversation__updated_at")
         )
-        return Response({"total_unread": total_unread, "conversations": list(conv_counts)}, status=status.HTTP_200_OK)
+        conv_counts = [
+            {"id": pk, "subject": subject, "unread": count, "updated_at": updated_at}
+            for pk, subject, count, updated_at in rows
+        ]
+        total_unread = sum(row["unread"] for row in conv_counts)
+        return Response({"total_unread": total_unread, "conversations": conv_counts}, status=status.HTTP_200_OK)
 
 
 class MessageViewSet(viewsets.GenericViewSet):
@@ -2,6 +2,8 @@
 ASGI config for fiverrBackend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the chat push feed
+(chat.realtime).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,23 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fiverrBackend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+if settings.DEBUG:
+    # What runserver does for WSGI: serve admin/static files in development
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    django_application = ASGIStaticFilesHandler(django_application)
+
+# Imported after setup: it uses models and settings
+from chat.realtime import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -25,6 +25,19 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://localhost:3000",
 ]
+from corsheaders.defaults import default_headers  # noqa: E402
+
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
+# `manage.py sweep_stale_orders`: deliveries the buyer hasn't answered are accepted
+# after ORDER_AUTO_ACCEPT_DAYS; orders still pending are cancelled after ORDER_PENDING_EXPIRY_DAYS
+ORDER_AUTO_ACCEPT_DAYS = int(os.getenv("ORDER_AUTO_ACCEPT_DAYS", 3))
+ORDER_PENDING_EXPIRY_DAYS = int(os.getenv("ORDER_PENDING_EXPIRY_DAYS", 14))
+
+# How long a stored Idempotency-Key response is replayed (orders.idempotency)
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+# A claimed key with no stored response after this many seconds is treated as abandoned
+IDEMPOTENCY_PROCESSING_LEASE = int(os.getenv("IDEMPOTENCY_PROCESSING_LEASE", 60))
 
 # JWT Settings
 SIMPLE_JWT = {
@@ -127,6 +140,24 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Cache (used by the gig response cache and DRF throttling)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "fiverr-default"),
+    }
+}
+if CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 10000))}
+# Cached gig pages are invalidated by version bumps; the timeout is only a safety net
+GIG_CACHE_TIMEOUT = int(os.getenv("GIG_CACHE_TIMEOUT", 3600))
+
+# Background threads rendering gig image variants; 0 renders inline after commit
+GIG_IMAGE_WORKERS = int(os.getenv("GIG_IMAGE_WORKERS", 2))
+
+# Gig search: dotted path to a gigs.search backend; empty picks one for the DB vendor
+GIG_SEARCH_BACKEND = os.getenv("GIG_SEARCH_BACKEND", "")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "users.User"
 
@@ -139,6 +170,22 @@ EMAIL_HOST_USER = os.getenv("SMTP_USER")
 EMAIL_HOST_PASSWORD = os.getenv("SMTP_PASS")
 DEFAULT_FROM_EMAIL = os.getenv("EMAIL_FROM", EMAIL_HOST_USER)
 
+# Fan-out for the chat WebSocket feed (chat.realtime); the in-memory broker only
+# reaches sockets served by the same process
+CHAT_BROKER = os.getenv("CHAT_BROKER", "chat.realtime.InMemoryBroker")
+
+# Seconds a user's unread badge totals (notifications.badges) are served from cache;
+# writes evict the entry, so this only bounds how long an idle entry lives
+BADGE_CACHE_TIMEOUT = int(os.getenv("BADGE_CACHE_TIMEOUT", 300))
+
+# Notification emails go through the outbox (notifications.outbox), drained by
+# `manage.py process_outbox`; failed sends are retried with exponential backoff
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_BACKOFF_BASE = int(os.getenv("OUTBOX_BACKOFF_BASE", 30))  # seconds
+OUTBOX_BACKOFF_MAX = int(os.getenv("OUTBOX_BACKOFF_MAX", 3600))
+# How long a claimed batch stays reserved before another worker may retry it
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+
 # Logging
 LOGGING = {
     "version": 1,
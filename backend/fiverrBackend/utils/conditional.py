@@ -0,0 +1,50 @@
+"""
+Conditional GET helpers (ETag / Last-Modified) for DRF views.
+
+Views compute their validators from something cheap (a version counter, or
+an aggregate over ``updated_at``) *before* loading and serializing the full
+payload, then::
+
+    not_modified = conditional_response(request, etag=etag, last_modified=stamp)
+    if not_modified is not None:
+        return not_modified
+    response = ...  # build the full response
+    return set_validators(response, etag=etag, last_modified=stamp)
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Quoted ETag from the string form of ``parts``."""
+    raw = "|".join(str(part) for part in parts)
+    return quote_etag(hashlib.md5(raw.encode("utf-8")).hexdigest())
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified is not None else None
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag is not None:
+        response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(_timestamp(last_modified))
+    return response
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """
+    Return a 304 (or 412) response when the request's If-None-Match /
+    If-Modified-Since headers match the given validators, otherwise None.
+    """
+    response = get_conditional_response(
+        request._request if hasattr(request, "_request") else request,
+        etag=etag,
+        last_modified=_timestamp(last_modified),
+    )
+    if response is not None:
+        set_validators(response, etag=etag, last_modified=last_modified)
+    return response
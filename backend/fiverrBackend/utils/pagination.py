@@ -0,0 +1,145 @@
+import json
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a composite key such as (-created_at, -id).
+
+    DRF's CursorPagination only keys on the first ordering field and uses an
+    OFFSET to step over ties. Here the cursor carries the value of every
+    ordering field and the ordering always ends in the primary key, so each
+    page is a single index range scan however deep or tied it is.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def get_default_ordering(self, queryset):
+        return self.ordering
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if hasattr(backend, "get_ordering"):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = self.get_default_ordering(queryset)
+        ordering = (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        assert not any("__" in field for field in ordering), (
+            "Keyset pagination does not support double underscore lookups for orderings."
+        )
+        # Always finish on the primary key so the key is unique
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = self._filter_after(queryset, ordering, position)
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _filter_after(self, queryset, ordering, position):
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        # (a, b, c) after (x, y, z) expands to
+        # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        # AND-ed with a >= x so the planner can seek on the leading column.
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, position):
+            name = field.lstrip("-")
+            op = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{op}": value})
+            equal[f"{name}__exact"] = value
+        leading = ordering[0]
+        leading_op = "lte" if leading.startswith("-") else "gte"
+        try:
+            return queryset.filter(Q(**{f"{leading.lstrip('-')}__{leading_op}": position[0]}), condition)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip("-")
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value if isinstance(value, (int, float)) else str(value))
+        return values
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = json.loads(tokens["p"][0])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": json.dumps(cursor.position, separators=(",", ":"))}
+        if cursor.reverse:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+def _reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
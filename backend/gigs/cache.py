@@ -0,0 +1,99 @@
+"""
+Versioned response cache for the public gig endpoints.
+
+Cached payloads are keyed on the request's host/query string plus a version
+counter: one for the whole catalogue (list pages) and one per gig slug
+(detail pages). Writes bump the relevant counters instead of deleting keys,
+so stale entries are simply never read again and expire on their own.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+CATALOGUE_VERSION_KEY = "gigs:v:catalogue"
+
+
+def _gig_version_key(slug):
+    return f"gigs:v:gig:{slug}"
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def catalogue_version():
+    return _get_version(CATALOGUE_VERSION_KEY)
+
+
+def gig_version(slug):
+    return _get_version(_gig_version_key(slug))
+
+
+def invalidate_gigs(slugs=(), catalogue=True):
+    """
+    Bump the version counters for the given gigs (and the catalogue).
+
+    Counters are bumped immediately and again after commit, so a reader that
+    re-caches the pre-commit state in between is invalidated as well.
+    """
+    keys = [_gig_version_key(slug) for slug in slugs if slug]
+    if catalogue:
+        keys.append(CATALOGUE_VERSION_KEY)
+
+    def bump():
+        for key in keys:
+            _bump(key)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_gig_ids(gig_ids, catalogue=True):
+    from .models import Gig
+
+    gig_ids = list(gig_ids)
+    slugs = Gig.objects.filter(pk__in=gig_ids).values_list("slug", flat=True) if gig_ids else []
+    invalidate_gigs(slugs, catalogue=catalogue)
+
+
+def response_key(kind, request, version, param_names=None):
+    """
+    Cache key for a response. ``param_names`` restricts the query string to
+    the parameters that affect the payload, so e.g. paging params don't
+    fragment the cache of an endpoint that ignores them.
+    """
+    params = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+        if param_names is None or name in param_names
+    )
+    raw = f"{request.get_host()}|{request.path}|{params}"
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"gigs:r:{kind}:{version}:{digest}"
+
+
+def cached_response(key, build):
+    """Return the cached payload for ``key`` or build, cache (if 200) and return it."""
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+    response = build()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=settings.GIG_CACHE_TIMEOUT)
+    return response
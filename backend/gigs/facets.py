@@ -0,0 +1,91 @@
+"""
+Facet counts for the gig browse page.
+
+Counts are computed for an already filtered Gig queryset in three queries:
+one GROUP BY over categories, one GROUP BY over the gig/tag through table,
+and one aggregate with a filtered COUNT per price and delivery bucket.
+"""
+from django.db.models import Count, Max, Min, Q
+
+from .models import Gig
+
+TAG_FACET_LIMIT = 30
+
+# (lower bound inclusive, upper bound exclusive); None means open-ended
+PRICE_BUCKETS = (
+    (None, 25),
+    (25, 50),
+    (50, 100),
+    (100, 250),
+    (250, None),
+)
+
+# "Delivers within N days"
+DELIVERY_BUCKETS = (1, 3, 7, 14)
+
+
+def _price_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def category_facets(queryset):
+    rows = (
+        queryset.filter(category__isnull=False)
+        .order_by()
+        .values("category__slug", "category__name")
+        .annotate(count=Count("id"))
+        .order_by("-count", "category__name")
+    )
+    return [
+        {"slug": row["category__slug"], "name": row["category__name"], "count": row["count"]}
+        for row in rows
+    ]
+
+
+def tag_facets(queryset, limit=TAG_FACET_LIMIT):
+    rows = (
+        Gig.tags.through.objects.filter(gig__in=queryset.order_by().values("pk"))
+        .values("tag__slug", "tag__name")
+        .annotate(count=Count("gig_id"))
+        .order_by("-count", "tag__name")[:limit]
+    )
+    return [
+        {"slug": row["tag__slug"], "name": row["tag__name"], "count": row["count"]}
+        for row in rows
+    ]
+
+
+def range_facets(queryset):
+    aggregates = {
+        "total": Count("id"),
+        "min_price": Min("price"),
+        "max_price": Max("price"),
+    }
+    for i, (low, high) in enumerate(PRICE_BUCKETS):
+        aggregates[f"price_{i}"] = Count("id", filter=_price_q(low, high))
+    for days in DELIVERY_BUCKETS:
+        aggregates[f"delivery_{days}"] = Count("id", filter=Q(delivery_time__lte=days))
+    row = queryset.order_by().aggregate(**aggregates)
+    return {
+        "total": row["total"],
+        "price_range": {"min": row["min_price"], "max": row["max_price"]},
+        "price": [
+            {"min": low, "max": high, "count": row[f"price_{i}"]}
+            for i, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        "delivery_time": [
+            {"max_days": days, "count": row[f"delivery_{days}"]} for days in DELIVERY_BUCKETS
+        ],
+    }
+
+
+def compute_facets(queryset):
+    facets = range_facets(queryset)
+    facets["categories"] = category_facets(queryset)
+    facets["tags"] = tag_facets(queryset)
+    return facets
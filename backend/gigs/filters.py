@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.db.models import Exists, OuterRef
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from .models import Tag
+from .search import get_search_backend
+
+
+class GigSearchFilter(filters.SearchFilter):
+    """
+    Backs the ``?search=`` parameter with the full-text search backend.
+    Results are ordered by relevance unless the client asks for an explicit ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        queryset = get_search_backend().search(queryset, query)
+        if "search_rank" in queryset.query.annotations and not request.query_params.get(
+            api_settings.ORDERING_PARAM
+        ):
+            queryset = queryset.order_by("-search_rank", "-created_at")
+        return queryset
+
+
+class GigAttributeFilter(filters.BaseFilterBackend):
+    """
+    Narrows gigs by ``?category=<slug>``, ``?tag=<slug>`` (repeatable, all
+    must match), ``?min_price=``, ``?max_price=`` and ``?max_delivery=`` (days).
+    """
+
+    params = ("category", "tag", "min_price", "max_price", "max_delivery")
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        category = params.get("category")
+        if category:
+            queryset = queryset.filter(category__slug=category)
+        for tag in dict.fromkeys(params.getlist("tag")):
+            if tag:
+                queryset = queryset.filter(Exists(Tag.objects.filter(gigs=OuterRef("pk"), slug=tag)))
+        min_price = self._number(params, "min_price", Decimal)
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        max_price = self._number(params, "max_price", Decimal)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+        max_delivery = self._number(params, "max_delivery", int)
+        if max_delivery is not None:
+            queryset = queryset.filter(delivery_time__lte=max_delivery)
+        return queryset
+
+    @staticmethod
+    def _number(params, name, cast):
+        value = params.get(name, "").strip()
+        if not value:
+            return None
+        try:
+            number = cast(value)
+        except (ArithmeticError, ValueError):
+            number = None
+        if number is None or (isinstance(number, Decimal) and not number.is_finite()):
+            raise ValidationError({name: "A valid number is required."})
+        return number
@@ -0,0 +1,143 @@
+"""
+Resized/recompressed variants of gig thumbnails and gallery images.
+
+Uploads are stored as-is; after the upload commits, a background worker
+renders each configured width as WebP and JPEG and records the storage
+names on the owning row (``Gig.thumbnail_variants`` / ``GigImage.variants``):
+
+    {"source": "gigs/thumbnails/a.png",
+     "sizes": {"200": {"webp": "gigs/variants/a-200.webp", "jpeg": "..."}, ...}}
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from .cache import invalidate_gig_ids
+from .models import Gig, GigImage
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (200, 600, 1200)
+VARIANT_FORMATS = {
+    # key: (Pillow format, save options)
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+VARIANT_DIR = "gigs/variants"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def render_variants(field_file):
+    """Render every variant of an image field file and return the variants map."""
+    field_file.open("rb")
+    try:
+        with Image.open(field_file) as source:
+            source = ImageOps.exif_transpose(source).convert("RGB")
+            stem = os.path.splitext(os.path.basename(field_file.name))[0]
+            # Never upscale: widths larger than the original collapse to the original width
+            widths = sorted({min(width, source.width) for width in VARIANT_WIDTHS})
+            sizes = {}
+            for width in widths:
+                height = max(1, round(source.height * width / source.width))
+                resized = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+                sizes[str(width)] = {
+                    key: _save_variant(resized, f"{stem}-{width}", key) for key in VARIANT_FORMATS
+                }
+    finally:
+        field_file.close()
+    return {"source": field_file.name, "sizes": sizes}
+
+
+def _save_variant(image, name, key):
+    fmt, options = VARIANT_FORMATS[key]
+    buffer = BytesIO()
+    image.save(buffer, format=fmt, **options)
+    return default_storage.save(f"{VARIANT_DIR}/{name}.{key}", ContentFile(buffer.getvalue()))
+
+
+def _delete_variants(variants):
+    for formats in (variants or {}).get("sizes", {}).values():
+        for name in formats.values():
+            default_storage.delete(name)
+
+
+def process_gig_thumbnail(gig_id):
+    gig = Gig.objects.filter(pk=gig_id).only("id", "thumbnail", "thumbnail_variants").first()
+    if gig is None:
+        return
+    source = gig.thumbnail.name if gig.thumbnail else ""
+    if (gig.thumbnail_variants or {}).get("source", "") == source:
+        return
+    variants = render_variants(gig.thumbnail) if source else {}
+    # Only store if the thumbnail wasn't replaced while we were rendering
+    unchanged = Q(thumbnail=source) if source else Q(thumbnail="") | Q(thumbnail__isnull=True)
+    updated = Gig.objects.filter(unchanged, pk=gig_id).update(thumbnail_variants=variants)
+    if not updated:
+        _delete_variants(variants)
+        return
+    _delete_variants(gig.thumbnail_variants)
+    invalidate_gig_ids([gig_id])
+
+
+def process_gig_image(image_id):
+    image = GigImage.objects.filter(pk=image_id).first()
+    if image is None or (image.variants or {}).get("source") == image.image.name:
+        return
+    variants = render_variants(image.image)
+    if not GigImage.objects.filter(pk=image_id, image=image.image.name).update(variants=variants):
+        _delete_variants(variants)
+        return
+    _delete_variants(image.variants)
+    invalidate_gig_ids([image.gig_id], catalogue=False)
+
+
+def _run(func, pk):
+    try:
+        func(pk)
+    except Exception:
+        logger.exception("Failed to render image variants via %s(%s)", func.__name__, pk)
+    finally:
+        connections.close_all()
+
+
+def schedule(func, pk):
+    """
+    Run ``func(pk)`` once the current transaction commits: on the worker pool,
+    or inline when GIG_IMAGE_WORKERS is 0.
+    """
+
+    def submit():
+        if settings.GIG_IMAGE_WORKERS <= 0:
+            func(pk)
+            return
+        global _executor
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.GIG_IMAGE_WORKERS, thread_name_prefix="gig-images"
+                )
+        _executor.submit(_run, func, pk)
+
+    transaction.on_commit(submit)
+
+
+def variant_urls(variants, request=None):
+    """Map ``{width: {format: url}}`` for a stored variants dict."""
+    urls = {}
+    for width, formats in (variants or {}).get("sizes", {}).items():
+        urls[width] = {}
+        for key, name in formats.items():
+            url = default_storage.url(name)
+            urls[width][key] = request.build_absolute_uri(url) if request else url
+    return urls
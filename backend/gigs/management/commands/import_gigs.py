@@ -0,0 +1,249 @@
+import csv
+import json
+import os
+import re
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from gigs.cache import invalidate_gigs
+from gigs.models import SLUG_ALLOCATION_ATTEMPTS, Category, Gig, Tag
+from gigs.search import get_search_backend
+from gigs.serializers import GigImportSerializer
+
+User = get_user_model()
+
+TAG_SPLIT_RE = re.compile(r"[|,]")
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream gigs from a CSV or JSONL file and insert them in batches. "
+        "Columns: title, description, price, delivery_time, revisions, category, tags, seller."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file to import.")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=["csv", "jsonl"],
+            help="Input format (defaults to the file extension).",
+        )
+        parser.add_argument(
+            "--seller",
+            help="Email or id of the seller for rows without a seller column.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate rows without writing anything."
+        )
+        parser.add_argument(
+            "--max-errors", type=int, default=20, help="How many invalid rows to print."
+        )
+        parser.add_argument(
+            "--skip-rows",
+            type=int,
+            default=0,
+            help="Skip the first N rows (to resume after a partial run).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        file_format = options["file_format"] or (
+            "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        )
+        batch_size = max(1, options["batch_size"])
+        self.dry_run = options["dry_run"]
+        self.max_errors = options["max_errors"]
+        self.default_seller = options["seller"]
+        self.imported = self.skipped = 0
+        # Input rows whose batch is committed (or skipped): where a re-run resumes
+        self.rows_done = max(0, options["skip_rows"])
+        self.started = time.monotonic()
+
+        rows = islice(self.read_rows(path, file_format), self.rows_done, None)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            self.rows_done += len(batch)
+            self.stdout.write(
+                f"{self.imported} imported, {self.skipped} skipped, {self.rows_done} rows done "
+                f"({self.rate():.0f} rows/s)"
+            )
+
+        if self.imported and not self.dry_run:
+            invalidate_gigs(catalogue=True)
+        verb = "Validated" if self.dry_run else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {self.imported} gig(s), skipped {self.skipped} in "
+                f"{time.monotonic() - self.started:.1f}s ({self.rate():.0f} rows/s)."
+            )
+        )
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return (self.imported + self.skipped) / elapsed if elapsed else 0
+
+    def read_rows(self, path, file_format):
+        """Yield (line_number, row_dict) without loading the file into memory."""
+        with open(path, newline="", encoding="utf-8") as fh:
+            if file_format == "csv":
+                reader = csv.DictReader(fh)
+                for row in reader:
+                    yield reader.line_num, row
+                return
+            for line_number, line in enumerate(fh, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    row = {"__error__": f"invalid JSON: {exc}"}
+                yield line_number, row
+
+    def report(self, line_number, errors):
+        self.skipped += 1
+        if self.skipped <= self.max_errors:
+            self.stderr.write(f"line {line_number}: {errors}")
+
+    def import_batch(self, batch):
+        sellers = self.resolve_sellers(batch)
+        valid = []
+        for line_number, row in batch:
+            if not isinstance(row, dict) or "__error__" in row:
+                error = row["__error__"] if isinstance(row, dict) else "not a JSON object"
+                self.report(line_number, error)
+                continue
+            seller_key = str(row.get("seller") or self.default_seller or "").strip()
+            seller_id = sellers.get(seller_key)
+            if seller_id is None:
+                self.report(line_number, f"unknown seller {seller_key!r}")
+                continue
+            data = {key: value for key, value in row.items() if value not in (None, "")}
+            if isinstance(data.get("tags"), str):
+                data["tags"] = [t.strip() for t in TAG_SPLIT_RE.split(data["tags"]) if t.strip()]
+            serializer = GigImportSerializer(data=data)
+            if not serializer.is_valid():
+                self.report(line_number, dict(serializer.errors))
+                continue
+            valid.append((seller_id, serializer.validated_data))
+
+        if self.dry_run:
+            self.imported += len(valid)
+            return
+        if valid:
+            self.write_batch_with_retry(batch[0][0], valid)
+            self.imported += len(valid)
+
+    def write_batch_with_retry(self, first_line, valid):
+        """
+        Write the batch, reallocating slugs when a concurrent create claimed
+        one of them first (the same bounded retry as Gig.save).
+        """
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            slugs = Gig.allocate_slugs([data["title"] for _, data in valid])
+            try:
+                with transaction.atomic():
+                    self.write_batch(valid, slugs)
+                return
+            except IntegrityError as exc:
+                taken = Gig.objects.filter(slug__in=slugs).exists()
+                if not taken or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    if self.imported:
+                        invalidate_gigs(catalogue=True)
+                    raise CommandError(
+                        f"Batch starting at line {first_line} failed: {exc}. "
+                        f"{self.imported} gig(s) from the first {self.rows_done} row(s) are committed; "
+                        f"re-run with --skip-rows {self.rows_done} to resume."
+                    ) from exc
+
+    def resolve_sellers(self, batch):
+        """Map each seller key (email or id) used in the batch to a seller id, in one query."""
+        keys = {
+            str(row.get("seller") or self.default_seller or "").strip()
+            for _, row in batch
+            if isinstance(row, dict)
+        }
+        keys.discard("")
+        ids = {key for key in keys if key.isdigit()}
+        emails = keys - ids
+        sellers = {}
+        for pk, email in User.objects.filter(
+            Q(pk__in=[int(pk) for pk in ids]) | Q(email__in=emails), is_seller=True
+        ).values_list("pk", "email"):
+            sellers[str(pk)] = pk
+            sellers[email] = pk
+        return sellers
+
+    def write_batch(self, valid, slugs):
+        category_ids = self.upsert_categories(
+            {data.get("category", "").strip() for _, data in valid} - {""}
+        )
+        gigs = [
+            Gig(
+                seller_id=seller_id,
+                title=data["title"],
+                slug=slug,
+                description=data["description"],
+                price=data["price"],
+                delivery_time=data.get("delivery_time", 3),
+                revisions=data.get("revisions", 0),
+                category_id=category_ids.get(data.get("category", "").strip()),
+            )
+            for (seller_id, data), slug in zip(valid, slugs)
+        ]
+        Gig.objects.bulk_create(gigs)
+        if any(gig.pk is None for gig in gigs):
+            # Backends that can't return ids from bulk inserts
+            pks = dict(Gig.objects.filter(slug__in=slugs).values_list("slug", "pk"))
+            for gig in gigs:
+                gig.pk = pks[gig.slug]
+
+        tag_ids = self.upsert_tags(
+            {name.strip() for _, data in valid for name in data.get("tags", []) if name.strip()}
+        )
+        Through = Gig.tags.through
+        Through.objects.bulk_create(
+            [
+                Through(gig_id=gig.pk, tag_id=tag_ids[name.strip()])
+                for gig, (_, data) in zip(gigs, valid)
+                for name in set(data.get("tags", []))
+                if name.strip() in tag_ids
+            ],
+            ignore_conflicts=True,
+        )
+        # bulk_create skips the save/m2m signals that maintain the search index
+        get_search_backend().index_gigs([gig.pk for gig in gigs])
+
+    def upsert_tags(self, names):
+        """Insert missing tags and return {name: id} with one insert and one select."""
+        if not names:
+            return {}
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=slugify(name)[:60]) for name in names], ignore_conflicts=True
+        )
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list("name", "pk"))
+        for name in names - set(tag_ids):
+            self.stderr.write(f"tag {name!r} skipped: its slug collides with an existing tag")
+        return tag_ids
+
+    def upsert_categories(self, names):
+        if not names:
+            return {}
+        Category.objects.bulk_create(
+            [Category(name=name, slug=slugify(name)[:110]) for name in names], ignore_conflicts=True
+        )
+        return dict(Category.objects.filter(name__in=names).values_list("name", "pk"))
+
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from gigs.images import process_gig_image, process_gig_thumbnail
+from gigs.models import Gig, GigImage
+
+
+class Command(BaseCommand):
+    help = "Render missing or stale size variants for gig thumbnails and gallery images."
+
+    def handle(self, *args, **options):
+        thumbnails = images = 0
+        with_thumbnail = Gig.objects.exclude(thumbnail="").exclude(thumbnail__isnull=True)
+        for gig_id in with_thumbnail.values_list("pk", flat=True).iterator():
+            process_gig_thumbnail(gig_id)
+            thumbnails += 1
+        for image_id in GigImage.objects.values_list("pk", flat=True).iterator():
+            process_gig_image(image_id)
+            images += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {thumbnails} thumbnail(s) and {images} gallery image(s).")
+        )
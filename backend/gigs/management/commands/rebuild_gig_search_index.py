@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from gigs.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for all gigs."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.create_index()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt gig search index ({backend.__class__.__name__})."))
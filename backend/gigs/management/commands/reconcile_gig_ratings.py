@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from gigs.models import Gig
+from reviews.models import Review
+
+
+class Command(BaseCommand):
+    help = "Backfill and reconcile the denormalized rating_sum/review_count columns on gigs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report gigs whose stored aggregates have drifted.",
+        )
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.filter(gig=OuterRef("pk")).order_by().values("gig")
+        actual_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum("rating")).values("total")),
+            Value(0),
+            output_field=IntegerField(),
+        )
+        actual_count = Coalesce(
+            Subquery(reviews.annotate(total=Count("id")).values("total")),
+            Value(0),
+            output_field=IntegerField(),
+        )
+
+        drifted = (
+            Gig.objects.annotate(actual_sum=actual_sum, actual_count=actual_count)
+            .exclude(Q(rating_sum=F("actual_sum")) & Q(review_count=F("actual_count")))
+        )
+        count = drifted.count()
+        if options["dry_run"]:
+            self.stdout.write(f"{count} gig(s) have drifted rating aggregates.")
+            return
+
+        updated = Gig.objects.filter(pk__in=drifted.values("pk")).update(
+            rating_sum=actual_sum, review_count=actual_count
+        )
+        self.stdout.write(self.style.SUCCESS(f"Reconciled rating aggregates for {updated} gig(s)."))
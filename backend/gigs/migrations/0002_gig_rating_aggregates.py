@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:57
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Gig = apps.get_model("gigs", "Gig")
+    Review = apps.get_model("reviews", "Review")
+    totals = Review.objects.values("gig_id").annotate(total=Sum("rating"), count=Count("id")).order_by()
+    for row in totals:
+        Gig.objects.filter(pk=row["gig_id"]).update(rating_sum=row["total"], review_count=row["count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0001_initial'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gig',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gig',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from gigs.search import backend_for_connection
+
+    backend = backend_for_connection(schema_editor.connection)
+    backend.create_index()
+    backend.rebuild()
+
+
+def drop_search_index(apps, schema_editor):
+    from gigs.search import backend_for_connection
+
+    backend_for_connection(schema_editor.connection).drop_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0002_gig_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
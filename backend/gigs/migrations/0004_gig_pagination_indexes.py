@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0003_gig_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='gigs_gig_is_acti_80f9a6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['is_active', 'price', 'id'], name='gigs_gig_is_acti_a016d0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['seller', 'is_active', '-created_at', '-id'], name='gigs_gig_seller__bc2ab9_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gigs', '0004_gig_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gig',
+            name='thumbnail_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='gigimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
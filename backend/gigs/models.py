@@ -1,8 +1,39 @@
-from django.db import models
+import re
+import secrets
+from collections import Counter
+
+from django.db import models, transaction, IntegrityError
+from django.db.models.functions import Cast, Substr
 from django.conf import settings
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator
-import uuid
+
+SLUG_ALLOCATION_ATTEMPTS = 3
+# Numbered suffixes are compared as bigints: longer ones are ignored (titles are user input)
+MAX_SLUG_SUFFIX_DIGITS = 18
+# Written only through their own F()/filtered updates (reviews.signals, gigs.images)
+MAINTAINED_FIELDS = ("rating_sum", "review_count", "thumbnail_variants")
+
+
+def next_free_slug(base, taken):
+    """
+    Return ``base`` or ``base-N`` with N one past the highest numeric suffix in ``taken``.
+    """
+    taken = set(taken)
+    if base not in taken:
+        return base
+    prefix = f"{base}-"
+    suffixes = [
+        int(slug[len(prefix):])
+        for slug in taken
+        if slug.startswith(prefix) and slug[len(prefix):].isdigit()
+        and len(slug) - len(prefix) <= MAX_SLUG_SUFFIX_DIGITS
+    ]
+    suffix = max(suffixes, default=1) + 1
+    if len(str(suffix)) > MAX_SLUG_SUFFIX_DIGITS:
+        # Past what Gig._claimed_slugs counts: a planted huge suffix must not pin every later slug
+        return f"{base}-{secrets.token_hex(4)}"
+    return f"{base}-{suffix}"
 
 
 class Tag(models.Model):
@@ -57,36 +88,114 @@ class Gig(models.Model):
     )
     tags = models.ManyToManyField(Tag, blank=True, related_name="gigs")
     thumbnail = models.ImageField(upload_to="gigs/thumbnails/", null=True, blank=True)
+    # Resized copies of the thumbnail, filled in by gigs.images
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
+    # Denormalized review aggregates, maintained by reviews.signals
+    rating_sum = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["slug", "seller"])]
+        indexes = [
+            models.Index(fields=["slug", "seller"]),
+            # keyset pagination: browse by newest / by price, and per-seller listings
+            models.Index(fields=["is_active", "-created_at", "-id"]),
+            models.Index(fields=["is_active", "price", "id"]),
+            models.Index(fields=["seller", "is_active", "-created_at", "-id"]),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.seller}"
 
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return 0
+        return round(self.rating_sum / self.review_count, 1)
+
+    @classmethod
+    def allocate_slugs(cls, titles):
+        """
+        Unique slugs for a batch of new gigs (bulk imports).
+
+        Exact collisions are found with a single IN query. Numbered siblings
+        are looked up only for bases that collide with an existing gig or
+        repeat within the batch; a unique base keeps its bare slug.
+        """
+        bases = [(slugify(title) or "gig")[:250] for title in titles]
+        colliding = set(cls.objects.filter(slug__in=set(bases)).values_list("slug", flat=True))
+        repeated = {base for base, count in Counter(bases).items() if count > 1}
+        taken = set(colliding)
+        for base in colliding | repeated:
+            taken.update(cls._claimed_slugs(base))
+        slugs = []
+        for base in bases:
+            slug = next_free_slug(base, taken)
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    @classmethod
+    def _claimed_slugs(cls, base, exclude_pk=None):
+        """
+        What next_free_slug needs to know about ``base``, in one aggregate
+        query: the base itself if taken, and its highest ``base-N`` sibling.
+        Non-numeric (``logo-design-pro``) and over-long suffixes are filtered
+        out in SQL, so the cast to bigint cannot overflow.
+        """
+        digits = rf"[0-9]{{1,{MAX_SLUG_SUFFIX_DIGITS}}}"
+        numbered = models.Q(slug__startswith=f"{base}-", slug__regex=rf"^{re.escape(base)}-{digits}$")
+        rows = cls.objects.filter(models.Q(slug=base) | numbered)
+        if exclude_pk is not None:
+            rows = rows.exclude(pk=exclude_pk)
+        found = rows.aggregate(
+            base_taken=models.Count("pk", filter=models.Q(slug=base)),
+            highest=models.Max(
+                Cast(Substr("slug", len(base) + 2), models.BigIntegerField()), filter=numbered
+            ),
+        )
+        claimed = {base} if found["base_taken"] else set()
+        if found["highest"] is not None:
+            claimed.add(f"{base}-{found['highest']}")
+        return claimed
+
     def _generate_unique_slug(self):
-        base = slugify(self.title) or "gig"
-        slug = base[:250]
-        Model = self.__class__
-        # if slug exists, append short uuid until unique
-        while Model.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-            slug = f"{base[:240]}-{uuid.uuid4().hex[:6]}"
-        return slug
+        base = (slugify(self.title) or "gig")[:250]
+        return next_free_slug(base, self._claimed_slugs(base, exclude_pk=self.pk))
 
     def save(self, *args, **kwargs):
-        if not self.slug:
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # A stale instance must not overwrite the maintained columns
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in MAINTAINED_FIELDS
+                and field.attname not in deferred
+            ]
+        if self.slug:
+            return super().save(*args, **kwargs)
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
             self.slug = self._generate_unique_slug()
-        super().save(*args, **kwargs)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # A concurrent create took the same slug between our read and insert
+                taken = self.__class__.objects.filter(slug=self.slug).exists()
+                self.slug = ""
+                if not taken or attempt == SLUG_ALLOCATION_ATTEMPTS - 1:
+                    raise
 
 
 class GigImage(models.Model):
     gig = models.ForeignKey(Gig, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="gigs/images/")
     alt_text = models.CharField(max_length=255, blank=True)
+    variants = models.JSONField(default=dict, blank=True, editable=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
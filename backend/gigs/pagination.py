@@ -0,0 +1,12 @@
+from fiverrBackend.utils.pagination import KeysetPagination
+
+
+class GigPagination(KeysetPagination):
+    """Newest first by default; relevance first for ?search= results."""
+
+    ordering = ("-created_at", "-id")
+
+    def get_default_ordering(self, queryset):
+        if "search_rank" in queryset.query.annotations:
+            return ("-search_rank", "-id")
+        return self.ordering
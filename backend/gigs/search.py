@@ -0,0 +1,241 @@
+"""
+Full-text search backends for gigs.
+
+Each backend keeps a separate index table in sync with gigs (title,
+description, tag names and category name) and exposes ``search`` which
+filters a Gig queryset and annotates it with ``search_rank`` (higher is
+more relevant). The backend is picked from ``settings.GIG_SEARCH_BACKEND``
+or, when unset, from the database vendor.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import FloatField, Q, Value, Exists, OuterRef
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Gig, Tag
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())[:16]
+
+
+class BaseSearchBackend:
+    def __init__(self, using=None):
+        self.using = using or router.db_for_write(Gig)
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def create_index(self):
+        """Create the backing index table (called from migrations)."""
+
+    def drop_index(self):
+        """Drop the backing index table (called from migrations)."""
+
+    def index_gigs(self, gig_ids):
+        """(Re)index the given gigs from their current rows."""
+
+    def remove_gigs(self, gig_ids):
+        """Drop the given gigs from the index."""
+
+    def rebuild(self):
+        """Rebuild the whole index from the gigs table."""
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Fallback for databases without a full-text engine: icontains matching
+    with tags checked through EXISTS so rows are never duplicated.
+    """
+
+    def search(self, queryset, query):
+        for term in tokenize(query):
+            tag_match = Tag.objects.filter(gigs=OuterRef("pk"), name__icontains=term)
+            queryset = queryset.filter(
+                Q(title__icontains=term)
+                | Q(description__icontains=term)
+                | Q(category__name__icontains=term)
+                | Exists(tag_match)
+            )
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """SQLite FTS5 virtual table keyed by gig id (rowid), ranked with bm25."""
+
+    table = "gigs_gig_fts"
+    # bm25 column weights: title, description, tags, category
+    weights = (10.0, 1.0, 5.0, 3.0)
+
+    documents_sql = (
+        "SELECT g.id, g.title, g.description, "
+        "COALESCE((SELECT group_concat(t.name, ' ') FROM gigs_tag t "
+        "INNER JOIN gigs_gig_tags gt ON gt.tag_id = t.id WHERE gt.gig_id = g.id), ''), "
+        "COALESCE(c.name, '') "
+        "FROM gigs_gig g LEFT OUTER JOIN gigs_category c ON c.id = g.category_id"
+    )
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, description, tags, category, tokenize = 'porter unicode61')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index_gigs(self, gig_ids):
+        gig_ids = [int(pk) for pk in gig_ids]
+        if not gig_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(gig_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", gig_ids)
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description, tags, category) "
+                f"{self.documents_sql} WHERE g.id IN ({placeholders})",
+                gig_ids,
+            )
+
+    def remove_gigs(self, gig_ids):
+        gig_ids = [int(pk) for pk in gig_ids]
+        if not gig_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(gig_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", gig_ids)
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, title, description, tags, category) {self.documents_sql}"
+            )
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        # Every term must match; trailing * allows prefix matches ("desi" -> "design")
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(w) for w in self.weights)
+        gig_pk = f'"{Gig._meta.db_table}"."{Gig._meta.pk.column}"'
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({self.table}, {weights}) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid = {gig_pk}",
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted tsvector side table with a GIN index, ranked with ts_rank."""
+
+    table = "gigs_gig_search"
+    config = "english"
+
+    documents_sql = (
+        "SELECT g.id, "
+        "setweight(to_tsvector(%(config)s::regconfig, g.title), 'A') || "
+        "setweight(to_tsvector(%(config)s::regconfig, COALESCE((SELECT string_agg(t.name, ' ') FROM gigs_tag t "
+        "INNER JOIN gigs_gig_tags gt ON gt.tag_id = t.id WHERE gt.gig_id = g.id), '')), 'B') || "
+        "setweight(to_tsvector(%(config)s::regconfig, COALESCE(c.name, '')), 'C') || "
+        "setweight(to_tsvector(%(config)s::regconfig, g.description), 'D') "
+        "FROM gigs_gig g LEFT OUTER JOIN gigs_category c ON c.id = g.category_id"
+    )
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "gig_id bigint PRIMARY KEY REFERENCES gigs_gig (id) ON DELETE CASCADE "
+                "DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index_gigs(self, gig_ids):
+        gig_ids = [int(pk) for pk in gig_ids]
+        if not gig_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.table} (gig_id, document) {self.documents_sql} "
+                "WHERE g.id = ANY(%(ids)s) "
+                "ON CONFLICT (gig_id) DO UPDATE SET document = EXCLUDED.document",
+                {"config": self.config, "ids": gig_ids},
+            )
+
+    def remove_gigs(self, gig_ids):
+        gig_ids = [int(pk) for pk in gig_ids]
+        if not gig_ids:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE gig_id = ANY(%s)", [gig_ids])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+            cursor.execute(
+                f"INSERT INTO {self.table} (gig_id, document) {self.documents_sql}",
+                {"config": self.config},
+            )
+
+    def search(self, queryset, query):
+        terms = tokenize(query)
+        if not terms:
+            return queryset
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        gig_pk = f'"{Gig._meta.db_table}"."{Gig._meta.pk.column}"'
+        return queryset.filter(
+            pk__in=RawSQL(
+                f"SELECT gig_id FROM {self.table} WHERE document @@ to_tsquery(%s::regconfig, %s)",
+                (self.config, tsquery),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank(document, to_tsquery(%s::regconfig, %s)) FROM {self.table} WHERE gig_id = {gig_pk}",
+                (self.config, tsquery),
+                output_field=FloatField(),
+            )
+        )
+
+
+VENDOR_BACKENDS = {
+    "sqlite": SQLiteFTSBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def backend_for_connection(connection):
+    backend_path = getattr(settings, "GIG_SEARCH_BACKEND", "")
+    backend_class = (
+        import_string(backend_path)
+        if backend_path
+        else VENDOR_BACKENDS.get(connection.vendor, SimpleSearchBackend)
+    )
+    return backend_class(using=connection.alias)
+
+
+def get_search_backend():
+    return backend_for_connection(connections[router.db_for_write(Gig)])
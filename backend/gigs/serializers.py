@@ -1,8 +1,10 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from rest_framework import serializers
 from .models import Gig, Tag, Category, GigImage
+from .images import variant_urls
 
 User = get_user_model()
 
@@ -15,12 +17,17 @@ class SellerSerializer(serializers.ModelSerializer):
 
 class GigImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField(read_only=True)
+    # {width: {"webp": url, "jpeg": url}}; empty until the variants are rendered
+    sizes = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = GigImage
-        fields = ("id", "image", "image_url", "alt_text")
+        fields = ("id", "image", "image_url", "sizes", "alt_text")
         extra_kwargs = {"image": {"write_only": True}}
 
+    def get_sizes(self, obj):
+        return variant_urls(obj.variants, self.context.get("request", None))
+
     def get_image_url(self, obj):
         request = self.context.get("request", None)
         if obj.image and hasattr(obj.image, "url"):
@@ -37,8 +44,9 @@ from reviews.serializers import ReviewDisplaySerializer
 class GigListSerializer(serializers.ModelSerializer):
     seller = SellerSerializer(read_only=True)
     thumbnail_url = serializers.SerializerMethodField(read_only=True)
-    average_rating = serializers.SerializerMethodField(read_only=True)
-    total_reviews = serializers.SerializerMethodField(read_only=True)
+    thumbnail_sizes = serializers.SerializerMethodField(read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    total_reviews = serializers.IntegerField(source="review_count", read_only=True)
 
     class Meta:
         model = Gig
@@ -50,6 +58,7 @@ class GigListSerializer(serializers.ModelSerializer):
             "delivery_time",
             "revisions",
             "thumbnail_url",
+            "thumbnail_sizes",
             "seller",
             "created_at",
             "is_active",
@@ -65,30 +74,53 @@ class GigListSerializer(serializers.ModelSerializer):
             return obj.thumbnail.url
         return None
 
-    def get_average_rating(self, obj):
-        if hasattr(obj, 'reviews') and obj.reviews.exists():
-            ratings = obj.reviews.values_list('rating', flat=True)
-            return round(sum(ratings) / len(ratings), 1)
-        return 0
-
-    def get_total_reviews(self, obj):
-        return obj.reviews.count() if hasattr(obj, 'reviews') else 0
+    def get_thumbnail_sizes(self, obj):
+        return variant_urls(obj.thumbnail_variants, self.context.get("request", None))
 
 
 class GigDetailSerializer(GigListSerializer):
+    # Only the newest reviews are embedded; the rest are paged from reviews_url
+    REVIEWS_PREVIEW_SIZE = 5
+
     description = serializers.CharField(read_only=True)
     tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field="name")
     images = GigImageSerializer(many=True, read_only=True)
     category = serializers.SerializerMethodField(read_only=True)
-    reviews = ReviewDisplaySerializer(many=True, read_only=True)
+    reviews = serializers.SerializerMethodField(read_only=True)
+    has_more_reviews = serializers.SerializerMethodField(read_only=True)
+    reviews_url = serializers.SerializerMethodField(read_only=True)
 
     class Meta(GigListSerializer.Meta):
         model = Gig
-        fields = GigListSerializer.Meta.fields + ("description", "tags", "images", "category", "reviews")
+        fields = GigListSerializer.Meta.fields + (
+            "description",
+            "tags",
+            "images",
+            "category",
+            "reviews",
+            "has_more_reviews",
+            "reviews_url",
+        )
 
     def get_category(self, obj):
         return obj.category.name if obj.category else None
 
+    def get_reviews(self, obj):
+        if not obj.review_count:
+            return []
+        reviews = obj.reviews.select_related("reviewer").order_by("-created_at", "-id")[
+            : self.REVIEWS_PREVIEW_SIZE
+        ]
+        return ReviewDisplaySerializer(reviews, many=True, context=self.context).data
+
+    def get_has_more_reviews(self, obj):
+        return obj.review_count > self.REVIEWS_PREVIEW_SIZE
+
+    def get_reviews_url(self, obj):
+        url = reverse("gig-reviews", kwargs={"gig_slug": obj.slug})
+        request = self.context.get("request", None)
+        return request.build_absolute_uri(url) if request else url
+
 
 class GigCreateSerializer(serializers.ModelSerializer):
     # Accept tags as a list of strings (names)
@@ -131,10 +163,34 @@ class GigCreateSerializer(serializers.ModelSerializer):
         tags = validated_data.pop("tags", [])
         validated_data['seller'] = request.user  # Fix: Add seller to validated_data
         gig = Gig.objects.create(**validated_data)
+        tag_objs = []
         for t in tags:
             if not t:
                 continue
             name = str(t).strip()
             tag_obj, _ = Tag.objects.get_or_create(name=name)
-            gig.tags.add(tag_obj)
-        return gig
\ No newline at end of file
+            tag_objs.append(tag_obj)
+        if tag_objs:
+            # single add so the search index is refreshed once
+            gig.tags.add(*tag_objs)
+        return gig
+
+
+class GigImportSerializer(GigCreateSerializer):
+    """
+    Validates one row of a bulk import with the same field rules as
+    GigCreateSerializer. Seller, category (by name) and tags are resolved
+    per batch by the import_gigs command.
+    """
+    category = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False, write_only=True
+    )
+    thumbnail = None
+
+    class Meta(GigCreateSerializer.Meta):
+        fields = ("title", "description", "price", "delivery_time", "revisions", "category", "tags")
+
+    def validate(self, attrs):
+        # No request user here: import_gigs resolves each row's seller to an is_seller user itself
+        return attrs
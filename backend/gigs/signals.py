@@ -0,0 +1,80 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .cache import invalidate_gigs, invalidate_gig_ids
+from .images import schedule, process_gig_thumbnail, process_gig_image
+from .models import Gig, GigImage, Tag, Category
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Gig)
+def index_gig_on_save(sender, instance, **kwargs):
+    get_search_backend().index_gigs([instance.pk])
+    invalidate_gigs([instance.slug])
+    thumbnail = instance.thumbnail.name if instance.thumbnail else ""
+    if thumbnail != (instance.thumbnail_variants or {}).get("source", ""):
+        schedule(process_gig_thumbnail, instance.pk)
+
+
+@receiver(post_delete, sender=Gig)
+def remove_gig_from_index(sender, instance, **kwargs):
+    get_search_backend().remove_gigs([instance.pk])
+    invalidate_gigs([instance.slug])
+
+
+@receiver(m2m_changed, sender=Gig.tags.through)
+def index_gig_on_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            get_search_backend().index_gigs([instance.pk])
+            invalidate_gigs([instance.slug])
+        return
+    # tag.gigs.add(...) / remove / clear: the gigs are on the other side
+    if action == "pre_clear":
+        instance._search_gig_ids = list(instance.gigs.values_list("pk", flat=True))
+        return
+    if action in ("post_add", "post_remove"):
+        gig_ids = list(pk_set or [])
+    elif action == "post_clear":
+        gig_ids = getattr(instance, "_search_gig_ids", [])
+    else:
+        return
+    get_search_backend().index_gigs(gig_ids)
+    invalidate_gig_ids(gig_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+def reindex_gigs_on_rename(sender, instance, created, **kwargs):
+    if not created:
+        gig_ids = list(instance.gigs.values_list("pk", flat=True))
+        get_search_backend().index_gigs(gig_ids)
+        invalidate_gig_ids(gig_ids)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Category)
+def remember_gigs_before_delete(sender, instance, **kwargs):
+    # Cascades/SET_NULL bypass m2m_changed and post_save, so reindex afterwards
+    instance._search_gig_ids = list(instance.gigs.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Category)
+def reindex_gigs_after_delete(sender, instance, **kwargs):
+    gig_ids = getattr(instance, "_search_gig_ids", [])
+    get_search_backend().index_gigs(gig_ids)
+    invalidate_gig_ids(gig_ids)
+
+
+@receiver(post_save, sender=GigImage)
+@receiver(post_delete, sender=GigImage)
+def invalidate_gig_on_image_change(sender, instance, **kwargs):
+    # Images only appear on the detail page
+    invalidate_gig_ids([instance.gig_id], catalogue=False)
+
+
+@receiver(post_save, sender=GigImage)
+def render_gig_image_variants(sender, instance, **kwargs):
+    if instance.image and instance.image.name != (instance.variants or {}).get("source"):
+        schedule(process_gig_image, instance.pk)
@@ -1,8 +1,22 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import Gig
+from django.core.cache import cache
+from .models import Category, Gig, GigImage, Tag, next_free_slug
+from .pagination import GigPagination
 
 User = get_user_model()
 
@@ -111,3 +125,504 @@ class GigAPITestCase(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["slug"], gig.slug)
+
+
+class GigSearchTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.logo = Gig.objects.create(
+            seller=self.seller,
+            title="Minimalist logo design",
+            description="Clean vector logos",
+            price="25.00",
+        )
+        self.site = Gig.objects.create(
+            seller=self.seller,
+            title="Build your website",
+            description="Includes a logo placeholder",
+            price="100.00",
+        )
+
+    def search(self, term):
+        response = self.client.get(reverse("gig-list"), {"search": term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [gig["slug"] for gig in response.data["results"]]
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(self.search("logo"), [self.logo.slug, self.site.slug])
+
+    def test_search_matches_prefixes_and_requires_all_terms(self):
+        self.assertEqual(self.search("webs"), [self.site.slug])
+        self.assertEqual(self.search("logo vector"), [self.logo.slug])
+
+    def test_index_follows_tag_changes(self):
+        tag = Tag.objects.create(name="branding")
+        self.site.tags.add(tag)
+        self.assertEqual(self.search("branding"), [self.site.slug])
+
+        tag.name = "identity"
+        tag.save()
+        self.assertEqual(self.search("branding"), [])
+        self.assertEqual(self.search("identity"), [self.site.slug])
+
+        tag.delete()
+        self.assertEqual(self.search("identity"), [])
+
+
+class GigPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        # Several gigs share a price so the keyset has to break ties on id
+        for i, price in enumerate(["10.00", "10.00", "10.00", "20.00", "5.00", "10.00", "30.00"]):
+            Gig.objects.create(
+                seller=self.seller, title=f"Gig {i}", description="desc", price=price
+            )
+
+    def walk(self, params):
+        url = reverse("gig-list")
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url, params if pages == 0 else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(gig["id"] for gig in response.data["results"])
+            url = response.data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_walks_newest_first_without_gaps(self):
+        ids, pages = self.walk({"page_size": 2})
+        expected = list(Gig.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_walks_price_ordering_across_ties(self):
+        ids, _ = self.walk({"page_size": 2, "ordering": "price"})
+        expected = list(Gig.objects.order_by("price", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(reverse("gig-list"), {"page_size": 3})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [g["id"] for g in back.data["results"]], [g["id"] for g in first.data["results"]]
+        )
+
+    def test_page_size_is_bounded_and_bad_cursor_rejected(self):
+        # Lower the cap below the fixture size so the clamp is observable
+        with mock.patch.object(GigPagination, "max_page_size", 3):
+            response = self.client.get(reverse("gig-list"), {"page_size": 10000})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIsNotNone(response.data["next"])
+        response = self.client.get(reverse("gig-list"), {"cursor": "bm9wZQ=="})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GigResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Cached gig", description="desc", price="25.00"
+        )
+
+    def test_list_and_detail_served_from_cache(self):
+        list_url = reverse("gig-list")
+        detail_url = reverse("gig-detail", kwargs={"slug": self.gig.slug})
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(list_url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(detail_url).data["slug"], self.gig.slug)
+
+    def test_gig_save_invalidates_list_and_detail(self):
+        list_url = reverse("gig-list")
+        detail_url = reverse("gig-detail", kwargs={"slug": self.gig.slug})
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        self.gig.title = "Renamed gig"
+        self.gig.save()
+        self.assertEqual(self.client.get(list_url).data["results"][0]["title"], "Renamed gig")
+        self.assertEqual(self.client.get(detail_url).data["title"], "Renamed gig")
+
+    def test_tag_and_image_changes_invalidate_detail(self):
+        detail_url = reverse("gig-detail", kwargs={"slug": self.gig.slug})
+        self.client.get(detail_url)
+        self.gig.tags.add(Tag.objects.create(name="vector"))
+        self.assertEqual(self.client.get(detail_url).data["tags"], ["vector"])
+
+        GigImage.objects.create(gig=self.gig, image="gigs/images/x.png")
+        self.assertEqual(len(self.client.get(detail_url).data["images"]), 1)
+
+    def test_other_gig_detail_stays_cached(self):
+        other = Gig.objects.create(
+            seller=self.seller, title="Other gig", description="desc", price="30.00"
+        )
+        detail_url = reverse("gig-detail", kwargs={"slug": self.gig.slug})
+        self.client.get(detail_url)
+        other.title = "Other gig renamed"
+        other.save()
+        with self.assertNumQueries(0):
+            self.client.get(detail_url)
+
+
+def make_png(name="upload.png", size=(800, 400)):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+@override_settings(GIG_IMAGE_WORKERS=0)
+class GigImageVariantTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.client.force_authenticate(user=self.seller)
+
+    def test_thumbnail_variants_rendered_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("gig-list"),
+                {
+                    "title": "Poster",
+                    "description": "desc",
+                    "price": "20.00",
+                    "thumbnail": make_png(),
+                },
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        gig = Gig.objects.get(slug=response.data["slug"])
+        self.assertEqual(gig.thumbnail_variants["source"], gig.thumbnail.name)
+        # The 800px original is never upscaled to 1200px
+        self.assertEqual(sorted(gig.thumbnail_variants["sizes"], key=int), ["200", "600", "800"])
+        small_path = os.path.join(self.media_root, gig.thumbnail_variants["sizes"]["200"]["webp"])
+        with Image.open(small_path) as small:
+            self.assertEqual(small.size, (200, 100))
+
+        detail = self.client.get(reverse("gig-detail", kwargs={"slug": gig.slug}))
+        self.assertTrue(detail.data["thumbnail_sizes"]["600"]["jpeg"].endswith(".jpeg"))
+
+    def test_gallery_upload_exposes_sizes(self):
+        gig = Gig.objects.create(seller=self.seller, title="Gallery", description="d", price="20.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("gig-upload-image", kwargs={"slug": gig.slug}),
+                {"image": make_png(size=(300, 300))},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        detail = self.client.get(reverse("gig-detail", kwargs={"slug": gig.slug}))
+        self.assertEqual(sorted(detail.data["images"][0]["sizes"], key=int), ["200", "300"])
+
+
+class GigSlugTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+
+    def create(self, title="Logo design"):
+        return Gig.objects.create(seller=self.seller, title=title, description="d", price="10.00")
+
+    def test_colliding_titles_get_numbered_slugs(self):
+        slugs = [self.create().slug for _ in range(3)]
+        self.assertEqual(slugs, ["logo-design", "logo-design-2", "logo-design-3"])
+        self.create("Logo design pro")
+        self.assertEqual(self.create().slug, "logo-design-4")
+
+    def test_highest_suffix_is_compared_numerically(self):
+        for slug in ("logo-design", "logo-design-9", "logo-design-10", "logo-design-pro-12"):
+            Gig.objects.create(seller=self.seller, title="x", slug=slug, description="d", price="10.00")
+        self.assertEqual(Gig._claimed_slugs("logo-design"), {"logo-design", "logo-design-10"})
+        self.assertEqual(self.create().slug, "logo-design-11")
+
+    def test_oversized_numeric_suffixes_are_ignored(self):
+        for slug in ("logo", "logo-7", "logo-99999999999999999999"):
+            Gig.objects.create(seller=self.seller, title="x", slug=slug, description="d", price="10.00")
+        self.assertEqual(Gig._claimed_slugs("logo"), {"logo", "logo-7"})
+        self.assertEqual(self.create("Logo").slug, "logo-8")
+        # The largest counted suffix cannot pin later slugs to one past it
+        Gig.objects.create(
+            seller=self.seller, title="x", slug="logo-999999999999999999", description="d", price="10.00"
+        )
+        first, second = self.create("Logo").slug, self.create("Logo").slug
+        self.assertNotEqual(first, second)
+        self.assertFalse(first[len("logo-"):].isdigit())
+
+    def test_slug_allocation_is_one_query(self):
+        for _ in range(5):
+            self.create()
+        with CaptureQueriesContext(connection) as ctx:
+            self.create()
+        slug_reads = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT") and "slug" in q["sql"]]
+        self.assertEqual(len(slug_reads), 1)
+
+    def test_insert_retries_when_slug_taken_concurrently(self):
+        self.create()
+        # Simulate a concurrent create having claimed the slug after our read
+        with mock.patch.object(
+            Gig, "_generate_unique_slug", side_effect=["logo-design", "logo-design-2"]
+        ):
+            gig = self.create()
+        self.assertEqual(gig.slug, "logo-design-2")
+
+    def test_next_free_slug_ignores_non_numeric_suffixes(self):
+        self.assertEqual(next_free_slug("logo", []), "logo")
+        self.assertEqual(next_free_slug("logo", ["logo", "logo-a1b2c3", "logo-7"]), "logo-8")
+
+
+class GigImportCommandTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_gigs", path, "--seller", self.seller.email, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_creates_gigs_tags_and_index(self):
+        Gig.objects.create(seller=self.seller, title="Logo design", description="d", price="10.00")
+        path = self.write(
+            "gigs.csv",
+            "title,description,price,delivery_time,category,tags\n"
+            "Logo design,Vector logos,25.00,2,Design,logo|branding\n"
+            "Logo design,Another one,30.00,3,Design,logo\n"
+            "Too cheap,Nope,1.00,1,,\n"
+            "Python scripts,Automation,50.00,5,Programming,python\n",
+        )
+        out, err = self.run_import(path, "--batch-size", "2")
+
+        self.assertIn("Imported 3 gig(s), skipped 1", out)
+        self.assertIn("line 4", err)
+        slugs = set(Gig.objects.values_list("slug", flat=True))
+        self.assertEqual(slugs, {"logo-design", "logo-design-2", "logo-design-3", "python-scripts"})
+        imported = Gig.objects.get(slug="logo-design-2")
+        self.assertEqual(imported.seller, self.seller)
+        self.assertEqual(imported.category.name, "Design")
+        self.assertEqual(set(imported.tags.values_list("name", flat=True)), {"logo", "branding"})
+        self.assertEqual(Tag.objects.filter(name="logo").count(), 1)
+
+        response = self.client.get(reverse("gig-list"), {"search": "automation"})
+        self.assertEqual([g["slug"] for g in response.data["results"]], ["python-scripts"])
+
+    def test_batch_duplicates_skip_existing_numbered_slugs(self):
+        # The bare base is free but a numbered sibling already exists
+        Gig.objects.create(
+            seller=self.seller, title="x", slug="logo-design-2", description="d", price="10.00"
+        )
+        path = self.write(
+            "gigs.csv",
+            "title,description,price\n"
+            "Logo design,One,25.00\n"
+            "Logo design,Two,30.00\n",
+        )
+        out, _ = self.run_import(path)
+        self.assertIn("Imported 2 gig(s)", out)
+        slugs = set(Gig.objects.values_list("slug", flat=True))
+        self.assertEqual(slugs, {"logo-design", "logo-design-2", "logo-design-3"})
+
+    def test_batch_retries_when_a_slug_is_taken_concurrently(self):
+        Gig.objects.create(seller=self.seller, title="Logo design", description="d", price="10.00")
+        path = self.write("gigs.csv", "title,description,price\nLogo design,One,25.00\n")
+        # The first allocation lost the race: "logo-design-2" did not exist yet when read
+        allocate = Gig.allocate_slugs
+        with mock.patch.object(
+            Gig, "allocate_slugs", side_effect=[["logo-design"], allocate(["Logo design"])]
+        ):
+            out, _ = self.run_import(path)
+        self.assertIn("Imported 1 gig(s)", out)
+        self.assertTrue(Gig.objects.filter(slug="logo-design-2").exists())
+
+    def test_failed_batch_reports_how_to_resume(self):
+        Gig.objects.create(seller=self.seller, title="Taken", description="d", price="10.00")
+        path = self.write(
+            "gigs.csv",
+            "title,description,price\n"
+            "Voice over,One,25.00\n"
+            "Nope,Too cheap,1.00\n"
+            "Logo design,Two,30.00\n",
+        )
+        allocate = Gig.allocate_slugs
+
+        def allocate_or_collide(titles):
+            return ["taken"] if titles == ["Logo design"] else allocate(titles)
+
+        with mock.patch.object(Gig, "allocate_slugs", side_effect=allocate_or_collide):
+            with self.assertRaisesMessage(CommandError, "re-run with --skip-rows 2 to resume"):
+                self.run_import(path, "--batch-size", "2")
+        self.assertEqual(Gig.objects.count(), 2)
+
+        out, _ = self.run_import(path, "--skip-rows", "2")
+        self.assertIn("Imported 1 gig(s)", out)
+        self.assertEqual(
+            set(Gig.objects.values_list("slug", flat=True)), {"taken", "voice-over", "logo-design"}
+        )
+
+    def test_jsonl_dry_run_writes_nothing(self):
+        path = self.write(
+            "gigs.jsonl",
+            '{"title": "Voice over", "description": "English", "price": "15.00"}\n'
+            "not json\n",
+        )
+        out, err = self.run_import(path, "--dry-run")
+        self.assertIn("Validated 1 gig(s), skipped 1", out)
+        self.assertIn("line 2", err)
+        self.assertFalse(Gig.objects.exists())
+
+
+class GigFacetsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.design = Category.objects.create(name="Design")
+        self.code = Category.objects.create(name="Programming")
+        logo = Tag.objects.create(name="logo")
+        python = Tag.objects.create(name="python")
+        for title, price, days, category, tags in [
+            ("Logo design", "20.00", 1, self.design, [logo]),
+            ("Brand kit", "80.00", 5, self.design, [logo]),
+            ("Python scripts", "60.00", 3, self.code, [python]),
+            ("Django app", "300.00", 10, self.code, [python]),
+        ]:
+            gig = Gig.objects.create(
+                seller=self.seller,
+                title=title,
+                description="d",
+                price=price,
+                delivery_time=days,
+                category=category,
+            )
+            gig.tags.add(*tags)
+        self.url = reverse("gig-facets")
+
+    def test_counts_for_all_gigs(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        self.assertEqual(data["total"], 4)
+        self.assertEqual({c["slug"]: c["count"] for c in data["categories"]}, {"design": 2, "programming": 2})
+        self.assertEqual({t["slug"]: t["count"] for t in data["tags"]}, {"logo": 2, "python": 2})
+        self.assertEqual([b["count"] for b in data["price"]], [1, 0, 2, 0, 1])
+        self.assertEqual([b["count"] for b in data["delivery_time"]], [1, 2, 3, 4])
+
+    def test_counts_follow_filters_and_list_matches(self):
+        params = {"category": "programming", "max_price": "100"}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.data["total"], 1)
+        self.assertEqual(response.data["tags"], [{"slug": "python", "name": "python", "count": 1}])
+        listing = self.client.get(reverse("gig-list"), params)
+        self.assertEqual([g["title"] for g in listing.data["results"]], ["Python scripts"])
+
+        response = self.client.get(self.url, {"tag": "logo", "search": "brand"})
+        self.assertEqual(response.data["total"], 1)
+
+    def test_invalid_number_is_rejected(self):
+        response = self.client.get(self.url, {"min_price": "cheap"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cached_until_catalogue_changes(self):
+        self.client.get(self.url, {"category": "design"})
+        with self.assertNumQueries(0):
+            # paging params are not part of the facet signature
+            response = self.client.get(self.url, {"category": "design", "page_size": 5})
+        self.assertEqual(response.data["total"], 2)
+
+        Gig.objects.create(
+            seller=self.seller, title="Icons", description="d", price="15.00", category=self.design
+        )
+        response = self.client.get(self.url, {"category": "design"})
+        self.assertEqual(response.data["total"], 3)
+
+
+class GigConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="10.00"
+        )
+        self.url = reverse("gig-detail", kwargs={"slug": self.gig.slug})
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_when_gig_changes(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.gig.title = "Logo design pro"
+        self.gig.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_wildcard_etag_needs_an_existing_gig(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        missing = reverse("gig-detail", kwargs={"slug": "no-such-gig"})
+        response = self.client.get(missing, HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,8 +1,12 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
+from django.core.cache import cache
+
+from fiverrBackend.utils.conditional import conditional_response, make_etag, set_validators
 
 from .models import Gig, GigImage
 from .serializers import (
@@ -12,19 +16,19 @@ from .serializers import (
     GigImageSerializer,
 )
 from .permissions import IsSeller, IsOwnerOrReadOnly
+from .filters import GigAttributeFilter, GigSearchFilter
+from .pagination import GigPagination
+from .facets import compute_facets
+from .cache import cached_response, catalogue_version, gig_version, response_key
 
 
 class GigViewSet(viewsets.ModelViewSet):
-    # Updated queryset to include reviews prefetch
-    queryset = Gig.objects.filter(is_active=True).select_related("seller", "category").prefetch_related(
-        "tags", 
-        "images", 
-        "reviews__reviewer"  # This prefetches reviews with their reviewers
-    )
+    # List rows only need seller/category; review data comes from the denormalized columns
+    queryset = Gig.objects.filter(is_active=True).select_related("seller", "category")
     lookup_field = "slug"
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "description", "tags__name", "category__name"]
+    filter_backends = [GigAttributeFilter, GigSearchFilter, filters.OrderingFilter]
     ordering_fields = ["price", "created_at"]
+    pagination_class = GigPagination
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -45,16 +49,48 @@ class GigViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        key = response_key("list", request, catalogue_version())
+        return cached_response(key, lambda: super(GigViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        slug = kwargs[self.lookup_field]
+        version = gig_version(slug)
+        # The per-gig version covers everything the detail payload renders,
+        # so a matching If-None-Match for a cached gig never touches the database
+        etag = make_etag("gig", request.get_host(), slug, version)
+        key = response_key("detail", request, version)
+        # Only answer 304 for a gig that exists (If-None-Match: * matches anything):
+        # a cached payload proves it, otherwise one indexed lookup does
+        if cache.get(key) is None:
+            if not self.filter_queryset(self.get_queryset()).filter(slug=slug).exists():
+                raise NotFound()
+        not_modified = conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+        response = cached_response(key, lambda: super(GigViewSet, self).retrieve(request, *args, **kwargs))
+        if response.status_code == status.HTTP_200_OK:
+            set_validators(response, etag=etag)
+        return response
+
     def get_queryset(self):
-        """Override get_queryset to ensure reviews are always prefetched"""
         queryset = super().get_queryset()
-        
-        # For retrieve action (gig detail), make sure reviews are prefetched
-        if self.action == 'retrieve':
-            queryset = queryset.prefetch_related('reviews__reviewer')
-            
+        # Gig detail renders tags and images; reviews are fetched as a bounded first page
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("tags", "images")
         return queryset
 
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """Category, tag, price and delivery-time counts for the current filters."""
+        param_names = GigAttributeFilter.params + (GigSearchFilter.search_param,)
+        key = response_key("facets", request, catalogue_version(), param_names=param_names)
+        return cached_response(key, lambda: self._facets(request))
+
+    def _facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(compute_facets(queryset))
+
     @action(detail=True, methods=["post"], permission_classes=[IsOwnerOrReadOnly])
     def upload_image(self, request, slug=None):
         gig = self.get_object()
@@ -65,10 +101,14 @@ class GigViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], url_path="by-seller/(?P<seller_id>[^/.]+)")
     def by_seller(self, request, seller_id=None):
+        key = response_key("by-seller", request, catalogue_version())
+        return cached_response(key, lambda: self._by_seller(request, seller_id))
+
+    def _by_seller(self, request, seller_id):
         gigs = Gig.objects.filter(
             seller_id=seller_id, 
             is_active=True
-        ).select_related("seller", "category").prefetch_related("tags", "images", "reviews__reviewer")
+        ).select_related("seller", "category")
         
         page = self.paginate_queryset(gigs)
         if page is not None:
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, OutboxMessage
 
 
 @admin.register(Notification)
@@ -7,3 +7,11 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "type", "message", "is_read", "created_at")
     list_filter = ("is_read", "type", "created_at")
     search_fields = ("message", "user__username", "user__email")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipient", "subject", "status", "attempts", "available_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("recipient", "subject")
+    readonly_fields = ("claim_token", "last_error", "created_at", "sent_at")
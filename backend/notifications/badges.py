@@ -0,0 +1,72 @@
+"""
+Unread badge counters (chat messages and notifications) per user.
+
+Totals live in BadgeCounter, one row per user, and change with F()
+updates inside the writer's transaction (the row is inserted on first use,
+ignoring the conflict if a concurrent writer got there first). Reads go
+through the cache; writers drop the user's key immediately and again after
+commit, so a reader that caches the pre-commit value in between is evicted
+too. `manage.py reconcile_badges` recomputes everything from the source
+tables if the counters ever drift.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import BadgeCounter
+
+FIELDS = ("unread_messages", "unread_notifications")
+
+
+def _cache_key(user_id):
+    return f"badges:{user_id}"
+
+
+def invalidate(user_ids):
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def adjust(field, deltas):
+    """Add ``deltas`` ({user_id: amount}, negative to subtract) to ``field``, clamped at zero."""
+    deltas = {user_id: amount for user_id, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    # Only increments need a row to exist; a missing row already reads as zero
+    new_rows = [BadgeCounter(user_id=user_id) for user_id, amount in deltas.items() if amount > 0]
+    if new_rows:
+        BadgeCounter.objects.bulk_create(new_rows, ignore_conflicts=True)
+    # One UPDATE per distinct amount: a message to N people is a single statement
+    by_amount = defaultdict(list)
+    for user_id, amount in deltas.items():
+        by_amount[amount].append(user_id)
+    for amount, user_ids in by_amount.items():
+        BadgeCounter.objects.filter(user_id__in=user_ids).update(
+            **{field: Greatest(F(field) + amount, 0)}
+        )
+    invalidate(deltas)
+
+
+def notifications_created(notifications):
+    """Count new unread notifications; call for rows written with bulk_create."""
+    deltas = defaultdict(int)
+    for notification in notifications:
+        if not notification.is_read:
+            deltas[notification.user_id] += 1
+    adjust("unread_notifications", deltas)
+
+
+def get_badges(user_id):
+    """{"unread_messages": n, "unread_notifications": n}: one cache hit, or one primary-key read."""
+    key = _cache_key(user_id)
+    badges = cache.get(key)
+    if badges is None:
+        row = BadgeCounter.objects.filter(user_id=user_id).values(*FIELDS).first()
+        badges = row or dict.fromkeys(FIELDS, 0)
+        cache.set(key, badges, settings.BADGE_CACHE_TIMEOUT)
+    return badges
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = "Send queued notification emails from the outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval", type=float, default=5.0, help="Seconds to sleep when the outbox is empty."
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Drain what is due now and exit instead of polling."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        totals = [0, 0, 0]
+        try:
+            while True:
+                sent, retried, failed = process_batch(batch_size)
+                for i, count in enumerate((sent, retried, failed)):
+                    totals[i] += count
+                if sent or retried or failed:
+                    self.stdout.write(f"sent {sent}, retrying {retried}, gave up on {failed}")
+                if sent + retried + failed < batch_size:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Outbox: {totals[0]} sent, {totals[1]} scheduled for retry, {totals[2]} failed."
+            )
+        )
@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from chat.models import ConversationParticipant
+from notifications.badges import FIELDS, invalidate
+from notifications.models import BadgeCounter, Notification
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount unread badges from the source tables and repair drift: per-conversation "
+        "unread counts from read cursors, then each user's message and notification totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report drifted rows without fixing them."
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        # Counts are read first and written later, so every write is a compare-and-set
+        # on the value that was read: a row a concurrent send/notification changed in
+        # between is left alone (and reported) rather than losing its F() increment
+        changed_users = set()
+
+        drifted_memberships = list(
+            ConversationParticipant.objects.annotate(actual=ConversationParticipant.counted_unread())
+            .exclude(unread_count=F("actual"))
+            .values_list("pk", "user_id", "unread_count", "actual")
+        )
+        repaired_memberships = 0
+        if not dry_run:
+            for pk, user_id, old, actual in drifted_memberships:
+                membership = ConversationParticipant.objects.filter(pk=pk, unread_count=old)
+                if membership.update(unread_count=actual):
+                    repaired_memberships += 1
+                else:
+                    changed_users.add(user_id)
+
+        expected = {}
+        # Totals from the corrected per-conversation counts (also on a dry run)
+        corrected = {pk: actual for pk, _, _, actual in drifted_memberships}
+        memberships = ConversationParticipant.objects.values_list("pk", "user_id", "unread_count")
+        for pk, user_id, count in memberships.iterator(chunk_size=2000):
+            row = expected.setdefault(user_id, dict.fromkeys(FIELDS, 0))
+            row["unread_messages"] += corrected.get(pk, count) if dry_run else count
+        notifications = (
+            Notification.objects.filter(is_read=False).values("user_id").annotate(n=Count("id")).order_by()
+        )
+        for row in notifications:
+            expected.setdefault(row["user_id"], dict.fromkeys(FIELDS, 0))["unread_notifications"] = row["n"]
+
+        drifted_counters = []
+        for user_id, *values in BadgeCounter.objects.values_list("user_id", *FIELDS):
+            actual = expected.pop(user_id, dict.fromkeys(FIELDS, 0))
+            old = dict(zip(FIELDS, values))
+            if old != actual:
+                drifted_counters.append((user_id, old, actual))
+        # Users with unread items but no counter row yet
+        missing = [
+            BadgeCounter(user_id=user_id, **values)
+            for user_id, values in expected.items()
+            if any(values.values()) and user_id not in changed_users
+        ]
+        repaired_counters = 0
+        if not dry_run:
+            repaired_users = []
+            for user_id, old, actual in drifted_counters:
+                if user_id in changed_users:
+                    continue
+                if BadgeCounter.objects.filter(user_id=user_id, **old).update(**actual):
+                    repaired_users.append(user_id)
+                else:
+                    changed_users.add(user_id)
+            # ignore_conflicts: a row a writer inserted meanwhile is kept as is
+            created = BadgeCounter.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+            repaired_users += [counter.user_id for counter in created]
+            invalidate(repaired_users)
+            repaired_counters = len(repaired_users)
+
+        if dry_run:
+            message = (
+                f"Found {len(drifted_memberships)} conversation count(s) and "
+                f"{len(drifted_counters) + len(missing)} badge counter(s)."
+            )
+        else:
+            message = (
+                f"Repaired {repaired_memberships} conversation count(s) and "
+                f"{repaired_counters} badge counter(s)."
+            )
+            if changed_users:
+                message += f" {len(changed_users)} user(s) changed during the run; re-run to check them."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('recipient', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claim_token', models.UUIDField(blank=True, editable=False, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['available_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'available_at'], name='notificatio_status_676d13_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('order_placed', 'Order Placed'), ('order_delivered', 'Order Delivered'), ('order_rejected', 'Order Rejected'), ('order_accepted', 'Order Accepted'), ('order_paid', 'Order Paid'), ('order_cancelled', 'Order Cancelled')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_badge_counters(apps, schema_editor):
+    BadgeCounter = apps.get_model("notifications", "BadgeCounter")
+    Notification = apps.get_model("notifications", "Notification")
+    ConversationParticipant = apps.get_model("chat", "ConversationParticipant")
+    counters = {}
+    messages = ConversationParticipant.objects.values("user_id").annotate(n=Sum("unread_count")).order_by()
+    for row in messages:
+        counters.setdefault(row["user_id"], BadgeCounter(user_id=row["user_id"])).unread_messages = row["n"] or 0
+    notifications = Notification.objects.filter(is_read=False).values("user_id").annotate(n=Count("id")).order_by()
+    for row in notifications:
+        counters.setdefault(row["user_id"], BadgeCounter(user_id=row["user_id"])).unread_notifications = row["n"]
+    BadgeCounter.objects.bulk_create(counters.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_participant_unread_count'),
+        ('notifications', '0003_cancelled_status'),
+        ('users', '0003_user_is_seller'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BadgeCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='badge_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_messages', models.PositiveIntegerField(default=0)),
+                ('unread_notifications', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_badge_counters, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Notification(models.Model):
     TYPE_CHOICES = [
@@ -8,6 +9,7 @@ class Notification(models.Model):
         ("order_rejected", "Order Rejected"),
         ("order_accepted", "Order Accepted"),
         ("order_paid", "Order Paid"),
+        ("order_cancelled", "Order Cancelled"),
     ]
 
     user = models.ForeignKey(
@@ -25,3 +27,58 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.type}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Email waiting to be sent by the ``process_outbox`` worker.
+
+    Rows are written in the same transaction as the change that triggers
+    them, so an email goes out if and only if that change commits.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    recipient = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Next time a worker may pick the row up: pushed forward by claims (lease) and retries (backoff)
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["available_at", "id"]
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"{self.recipient} - {self.subject} ({self.status})"
+
+
+class BadgeCounter(models.Model):
+    """
+    Unread badge totals for one user, maintained incrementally by
+    notifications.badges (message sends, notification creation, reads) and
+    repaired by `manage.py reconcile_badges`.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="badge_counter"
+    )
+    unread_messages = models.PositiveIntegerField(default=0)
+    unread_notifications = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread_messages} messages, {self.unread_notifications} notifications"
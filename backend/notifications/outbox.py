@@ -0,0 +1,117 @@
+"""
+Transactional email outbox.
+
+``enqueue_email`` only inserts an ``OutboxMessage`` row, so request
+handlers never wait on SMTP. The ``process_outbox`` worker claims due rows
+in batches, sends them over one SMTP connection and reschedules failures
+with exponential backoff.
+
+Claims are a conditional UPDATE that stamps a token and pushes
+``available_at`` out by the lease, so concurrent workers never send the
+same row twice and rows held by a crashed worker become due again.
+"""
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(recipient, subject, body):
+    """Queue an email; returns the outbox row (None when there's no recipient)."""
+    if not recipient:
+        return None
+    return OutboxMessage.objects.create(recipient=recipient, subject=subject, body=body)
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before retry number ``attempts`` (1-based), with jitter."""
+    delay = min(settings.OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), settings.OUTBOX_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(batch_size):
+    now = timezone.now()
+    due = OutboxMessage.objects.filter(
+        status=OutboxMessage.STATUS_PENDING, available_at__lte=now
+    )
+    ids = list(due.order_by("available_at", "id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4()
+    # Rows another worker claimed since the SELECT no longer match `due`
+    due.filter(id__in=ids).update(
+        claim_token=token,
+        available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+    )
+    return list(OutboxMessage.objects.filter(claim_token=token).order_by("id"))
+
+
+def _mark_failed(message, error):
+    attempts = message.attempts + 1
+    give_up = attempts >= settings.OUTBOX_MAX_ATTEMPTS
+    OutboxMessage.objects.filter(pk=message.pk, claim_token=message.claim_token).update(
+        attempts=F("attempts") + 1,
+        status=OutboxMessage.STATUS_FAILED if give_up else OutboxMessage.STATUS_PENDING,
+        available_at=timezone.now() + timedelta(seconds=backoff_delay(attempts)),
+        claim_token=None,
+        last_error=error[:2000],
+    )
+    return give_up
+
+
+def process_batch(batch_size=100):
+    """Send one batch of due emails. Returns (sent, retried, failed)."""
+    messages = claim_batch(batch_size)
+    sent = retried = failed = 0
+    if not messages:
+        return sent, retried, failed
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("Outbox: could not connect to the mail server: %s", exc)
+        for message in messages:
+            if _mark_failed(message, repr(exc)):
+                failed += 1
+            else:
+                retried += 1
+        return sent, retried, failed
+
+    try:
+        for message in messages:
+            email = EmailMessage(
+                message.subject,
+                message.body,
+                settings.DEFAULT_FROM_EMAIL,
+                [message.recipient],
+                connection=connection,
+            )
+            try:
+                email.send()
+            except Exception as exc:
+                logger.warning("Outbox: sending message %s failed: %s", message.pk, exc)
+                if _mark_failed(message, repr(exc)):
+                    failed += 1
+                else:
+                    retried += 1
+                continue
+            OutboxMessage.objects.filter(pk=message.pk, claim_token=message.claim_token).update(
+                status=OutboxMessage.STATUS_SENT,
+                sent_at=timezone.now(),
+                attempts=F("attempts") + 1,
+                claim_token=None,
+            )
+            sent += 1
+    finally:
+        connection.close()
+    return sent, retried, failed
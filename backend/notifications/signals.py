@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .badges import notifications_created
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    # bulk_create skips this: callers report those rows themselves (badges.notifications_created)
+    if created:
+        notifications_created([instance])
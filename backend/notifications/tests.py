@@ -1,3 +1,182 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.models import Conversation, ConversationParticipant, Message
+from gigs.models import Gig
+from orders.models import Order
+from .models import BadgeCounter, Notification, OutboxMessage
+from .outbox import claim_batch, enqueue_email, process_batch
+
+User = get_user_model()
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=2, OUTBOX_BACKOFF_BASE=30, OUTBOX_BACKOFF_MAX=3600)
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+
+    def test_order_events_queue_emails_instead_of_sending(self):
+        order = Order.objects.create(
+            buyer=self.buyer,
+            seller=self.seller,
+            gig=self.gig,
+            price=self.gig.price,
+            status=Order.STATUS_ACCEPTED,
+        )
+        order.transition(Order.STATUS_COMPLETED)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING).count(), 3)
+
+        out = StringIO()
+        call_command("process_outbox", "--once", stdout=out)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["buyer@example.com", "seller@example.com", "seller@example.com"],
+        )
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.STATUS_SENT).exists())
+        self.assertIn("3 sent", out.getvalue())
+
+    def test_failed_send_backs_off_then_gives_up(self):
+        message = enqueue_email("buyer@example.com", "Hi", "Body")
+        with mock.patch("notifications.outbox.EmailMessage.send", side_effect=OSError("down")):
+            self.assertEqual(process_batch(), (0, 1, 0))
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboxMessage.STATUS_PENDING)
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.available_at, timezone.now())
+            self.assertIn("down", message.last_error)
+
+            # Not due yet
+            self.assertEqual(process_batch(), (0, 0, 0))
+            OutboxMessage.objects.update(available_at=timezone.now())
+            self.assertEqual(process_batch(), (0, 0, 1))
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.STATUS_FAILED)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_claimed_rows_are_not_sent_twice(self):
+        enqueue_email("buyer@example.com", "Hi", "Body")
+        first = claim_batch(10)
+        self.assertEqual(len(first), 1)
+        # A second worker finds nothing due while the lease is held
+        self.assertEqual(claim_batch(10), [])
+
+
+class BadgeCounterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.seller = User.objects.create_user(
+            email="seller@example.com", username="seller", password="pass1234", is_seller=True
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+        self.client = APIClient()
+
+    def badges(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get(reverse("notifications-badges")).data
+
+    def test_counters_follow_creation_and_reads(self):
+        order = Order.objects.create(buyer=self.buyer, seller=self.seller, gig=self.gig, price="25.00")
+        # Bulk-created status notifications are counted too
+        order.transition(Order.STATUS_DELIVERED)
+        self.assertEqual(self.badges(self.seller)["unread_notifications"], 1)
+        self.assertEqual(self.badges(self.buyer)["unread_notifications"], 1)
+
+        # Served from cache until something changes
+        with self.assertNumQueries(0):
+            self.client.get(reverse("notifications-badges"))
+
+        notification = Notification.objects.get(user=self.buyer)
+        url = reverse("notifications-mark-read", kwargs={"pk": notification.pk})
+        self.client.post(url)
+        self.client.post(url)
+        self.assertEqual(self.badges(self.buyer)["unread_notifications"], 0)
+
+        Notification.objects.create(user=self.seller, type="order_paid", message="m")
+        self.assertEqual(self.badges(self.seller)["unread_notifications"], 2)
+        response = self.client.post(reverse("notifications-mark-all-read"))
+        self.assertEqual(response.data["marked"], 2)
+        self.assertEqual(self.badges(self.seller)["unread_notifications"], 0)
+
+    def test_patch_with_stale_instance_counts_once(self):
+        notification, _ = [
+            Notification.objects.create(user=self.buyer, type="order_paid", message="m") for _ in range(2)
+        ]
+        url = reverse("notifications-detail", kwargs={"pk": notification.pk})
+        self.assertEqual(self.badges(self.buyer)["unread_notifications"], 2)
+        # mark_read lands between the PATCH loading the row and saving it
+        stale = Notification.objects.get(pk=notification.pk)
+        self.client.post(reverse("notifications-mark-read", kwargs={"pk": notification.pk}))
+        with mock.patch("notifications.views.NotificationViewSet.get_object", return_value=stale):
+            response = self.client.patch(url, {"is_read": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.badges(self.buyer)["unread_notifications"], 1)
+
+        self.client.patch(url, {"is_read": False}, format="json")
+        self.assertEqual(self.badges(self.buyer)["unread_notifications"], 2)
+
+    def test_reconcile_repairs_drift(self):
+        conversation = Conversation.objects.create()
+        conversation.participants.add(self.seller, self.buyer)
+        Message.objects.create(conversation=conversation, sender=self.seller, content="hi")
+        Notification.objects.create(user=self.buyer, type="order_paid", message="m")
+        BadgeCounter.objects.filter(user=self.buyer).update(unread_notifications=7)
+        ConversationParticipant.objects.filter(user=self.seller).update(unread_count=4)
+
+        out = StringIO()
+        call_command("reconcile_badges", stdout=out)
+        self.assertIn("Repaired 2 conversation count(s) and 1 badge counter(s).", out.getvalue())
+        self.assertEqual(
+            self.badges(self.buyer), {"unread_messages": 1, "unread_notifications": 1}
+        )
+        self.assertEqual(ConversationParticipant.objects.get(user=self.seller).unread_count, 0)
+
+    def test_reconcile_leaves_rows_changed_during_the_run(self):
+        Notification.objects.create(user=self.buyer, type="order_paid", message="m")
+        BadgeCounter.objects.filter(user=self.buyer).update(unread_notifications=7)
+        read_counters = BadgeCounter.objects.values_list
+
+        def read_then_notify(*fields):
+            rows = list(read_counters(*fields))
+            # A notification arrives after the counters were read
+            Notification.objects.create(user=self.buyer, type="order_paid", message="m")
+            return rows
+
+        out = StringIO()
+        with mock.patch.object(BadgeCounter.objects, "values_list", side_effect=read_then_notify):
+            call_command("reconcile_badges", stdout=out)
+        self.assertIn("1 user(s) changed during the run", out.getvalue())
+        # The concurrent increment was not overwritten
+        self.assertEqual(BadgeCounter.objects.get(user=self.buyer).unread_notifications, 8)
+
+        call_command("reconcile_badges", stdout=StringIO())
+        self.assertEqual(BadgeCounter.objects.get(user=self.buyer).unread_notifications, 2)
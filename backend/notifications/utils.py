@@ -1,11 +1,10 @@
 # notifications/utils.py
-from django.core.mail import send_mail
-from django.conf import settings
 from .models import Notification
+from .outbox import enqueue_email
 
 def notify(user, type, message, send_email=True):
     """
-    Create in-app notification + send email.
+    Create in-app notification + queue an email (sent by the outbox worker).
     """
     # In-app
     Notification.objects.create(
@@ -17,10 +16,4 @@ def notify(user, type, message, send_email=True):
     # Email
     if send_email and user.email:
         subject = f"[FreelanceHub] {dict(Notification.TYPE_CHOICES).get(type, 'Notification')}"
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=True,
-        )
+        enqueue_email(user.email, subject, message)
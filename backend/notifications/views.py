@@ -2,6 +2,8 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
+from . import badges as badge_counters
 from .models import Notification
 from .serializers import NotificationSerializer
 
@@ -12,9 +14,43 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+    def perform_update(self, serializer):
+        notif = serializer.instance
+        is_read = serializer.validated_data.get("is_read")
+        with transaction.atomic():
+            # Flip is_read conditionally, as mark_read does: the loaded instance may be
+            # stale, and only a request that actually changed the row moves the badge
+            if is_read is not None and Notification.objects.filter(
+                pk=notif.pk, is_read=not is_read
+            ).update(is_read=is_read):
+                badge_counters.adjust("unread_notifications", {notif.user_id: -1 if is_read else 1})
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            if not instance.is_read:
+                badge_counters.adjust("unread_notifications", {instance.user_id: -1})
+
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
         notif = self.get_object()
-        notif.is_read = True
-        notif.save(update_fields=["is_read"])
+        with transaction.atomic():
+            # Conditional so a repeated click doesn't decrement the badge twice
+            if Notification.objects.filter(pk=notif.pk, is_read=False).update(is_read=True):
+                badge_counters.adjust("unread_notifications", {notif.user_id: -1})
         return Response({"status": "marked as read"})
+
+    @action(detail=False, methods=["post"], url_path="mark-all-read")
+    def mark_all_read(self, request):
+        with transaction.atomic():
+            marked = self.get_queryset().filter(is_read=False).update(is_read=True)
+            # Subtract what was marked rather than zeroing: a notification created
+            # concurrently stays counted
+            badge_counters.adjust("unread_notifications", {request.user.id: -marked})
+        return Response({"marked": marked})
+
+    @action(detail=False, methods=["get"])
+    def badges(self, request):
+        """Unread chat messages and notifications for the navbar, from the maintained counters."""
+        return Response(badge_counters.get_badges(request.user.id))
@@ -1,8 +1,21 @@
 from django.contrib import admin
-from .models import Order
+from .models import Order, OrderEvent
+
+
+class OrderEventInline(admin.TabularInline):
+    model = OrderEvent
+    fields = ("created_at", "from_status", "to_status", "actor")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ("id", "gig", "buyer", "seller", "price", "status", "created_at")
     list_filter = ("status",)
     search_fields = ("buyer__email", "seller__email", "gig__title")
+    inlines = [OrderEventInline]
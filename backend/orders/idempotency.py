@@ -0,0 +1,138 @@
+"""
+``Idempotency-Key`` support for non-idempotent POST endpoints.
+
+A request carrying the header first claims its key: an IdempotencyKey row
+is inserted and committed on its own. The view then runs outside that
+transaction, so slow work (the Stripe call in checkout) never holds a
+write lock. The rendered response is stored on the row in a second short
+write. A retry with the same key costs one indexed lookup and gets the
+stored response back, marked with an ``Idempotent-Replayed: true``
+header, without running the view again:
+
+- same key, different request body/endpoint -> 422
+- a duplicate that arrives while the first request is still running
+  (the key is claimed but has no response yet) gets a 409
+- 5xx responses and exceptions release the claim, so the key can be retried
+- a claim still without a response after IDEMPOTENCY_PROCESSING_LEASE
+  seconds (the process died mid-request) is abandoned and can be reclaimed
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(scope, request):
+    data = request.data
+    if hasattr(data, "lists"):
+        data = {key: values for key, values in data.lists()}
+    raw = json.dumps([scope, request.method, request.path, data], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if record.status_code is None:
+        return Response(
+            {"detail": "A request with this key is still being processed."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = HttpResponse(
+        bytes(record.response_body or b""),
+        status=record.status_code,
+        content_type=record.content_type or "application/json",
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _lookup(user, key):
+    record = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    age = timezone.now() - record.created_at
+    if age > timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL):
+        # Outside the replay window: the key may be reused
+        record.delete()
+        return None
+    if record.status_code is None and age > timedelta(seconds=settings.IDEMPOTENCY_PROCESSING_LEASE):
+        # Abandoned claim; conditional so a response stored meanwhile is kept
+        if IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).delete()[0]:
+            return None
+        return IdempotencyKey.objects.filter(pk=record.pk).first()
+    return record
+
+
+def idempotent(scope):
+    """Decorate a view method (``self, request, ...``) so it honours ``Idempotency-Key``."""
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER, "").strip()
+            if not key or not request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > 255:
+                return Response(
+                    {"detail": f"{HEADER} must be at most 255 characters."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            fingerprint = request_fingerprint(scope, request)
+
+            record = _lookup(request.user, key)
+            if record is not None:
+                return _replay(record, fingerprint)
+
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=fingerprint
+                    )
+            except IntegrityError:
+                # Lost the race for this key to a concurrent duplicate
+                record = _lookup(request.user, key)
+                if record is None:
+                    return Response(
+                        {"detail": "A request with this key is still being processed."},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                return _replay(record, fingerprint)
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+            if response.status_code >= 500:
+                record.delete()
+                return response
+            if isinstance(response, Response):
+                body = JSONRenderer().render(response.data)
+                content_type = "application/json"
+            else:
+                body = response.content
+                content_type = response.get("Content-Type", "application/json")
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=response.status_code, content_type=content_type, response_body=body
+            )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL."
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency key(s)."))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+from orders.models import Order, OrderEvent, SellerDailyStats
+from orders.stats import TRANSITION_COUNTERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute SellerDailyStats from the order event history: placements on the day "
+        "an order was placed, every transition (including rejections) on the day it happened, "
+        "revenue on the day an order completed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seller", type=int, help="Only rebuild this seller id.")
+
+    def handle(self, *args, **options):
+        events = OrderEvent.objects.all()
+        if options["seller"]:
+            events = events.filter(order__seller_id=options["seller"])
+
+        rows = {}
+
+        def row(seller_id, day):
+            key = (seller_id, day)
+            if key not in rows:
+                rows[key] = SellerDailyStats(seller_id=seller_id, date=day)
+            return rows[key]
+
+        grouped = (
+            events.values("order__seller_id", "from_status", "to_status", day=TruncDate("created_at"))
+            .annotate(n=Count("id"), revenue=Sum("order__price"))
+        )
+        for item in grouped.order_by():
+            stats = row(item["order__seller_id"], item["day"])
+            if not item["from_status"]:
+                field = "orders_placed"
+            else:
+                field = TRANSITION_COUNTERS.get(item["to_status"])
+                if field is None:
+                    continue
+            setattr(stats, field, getattr(stats, field) + item["n"])
+            if item["to_status"] == Order.STATUS_COMPLETED and item["from_status"]:
+                stats.revenue += item["revenue"] or 0
+
+        with transaction.atomic():
+            existing = SellerDailyStats.objects.all()
+            if options["seller"]:
+                existing = existing.filter(seller_id=options["seller"])
+            existing.delete()
+            SellerDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(rows)} seller-day row(s)."))
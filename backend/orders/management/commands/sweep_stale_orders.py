@@ -0,0 +1,69 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Auto-accept deliveries the buyer has not answered and cancel orders that were "
+        "never delivered. Orders are moved in chunks with one conditional UPDATE each, "
+        "so an order the buyer or seller touches mid-sweep is left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--accept-after-days", type=int, default=settings.ORDER_AUTO_ACCEPT_DAYS,
+            help="Accept deliveries older than this many days.",
+        )
+        parser.add_argument(
+            "--expire-after-days", type=int, default=settings.ORDER_PENDING_EXPIRY_DAYS,
+            help="Cancel orders pending for more than this many days.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Count stale orders without changing them."
+        )
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep sweeping every this many seconds instead of running once.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        sweeps = (
+            ("accepted", Order.STATUS_DELIVERED, Order.STATUS_ACCEPTED, options["accept_after_days"]),
+            ("cancelled", Order.STATUS_PENDING, Order.STATUS_CANCELLED, options["expire_after_days"]),
+        )
+        try:
+            while True:
+                for label, from_status, to_status, days in sweeps:
+                    cutoff = timezone.now() - timedelta(days=days)
+                    stale = Order.objects.filter(status=from_status, updated_at__lt=cutoff)
+                    if options["dry_run"]:
+                        self.stdout.write(f"Would mark {stale.count()} order(s) {label}.")
+                        continue
+                    moved = self.sweep(stale, from_status, to_status, chunk_size)
+                    self.stdout.write(self.style.SUCCESS(f"Marked {moved} order(s) {label}."))
+                if not options["interval"] or options["dry_run"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def sweep(self, stale, from_status, to_status, chunk_size):
+        moved = 0
+        while True:
+            # Oldest first; each chunk is its own short transaction
+            ids = list(stale.order_by("updated_at", "id").values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                return moved
+            moved += len(
+                Order.objects.filter(pk__in=ids).transition(
+                    from_status, to_status, actor=Order.ACTOR_SYSTEM
+                )
+            )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_alter_order_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_buyer_i_7b59c7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['seller', '-created_at', '-id'], name='orders_orde_seller__10b2c6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['buyer', '-created_at', '-id'], name='orders_orde_buyer_i_7e646c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['seller', 'status', '-created_at', '-id'], name='orders_orde_seller__f2fdd8_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:22
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_inbox_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('orders_placed', models.PositiveIntegerField(default=0)),
+                ('orders_delivered', models.PositiveIntegerField(default=0)),
+                ('orders_rejected', models.PositiveIntegerField(default=0)),
+                ('orders_accepted', models.PositiveIntegerField(default=0)),
+                ('orders_completed', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['seller', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('seller', 'date'), name='unique_seller_daily_stats')],
+            },
+        ),
+    ]
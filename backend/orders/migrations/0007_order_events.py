@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+# Moves implied by each status for orders that predate the event table
+IMPLIED_MOVES = {
+    "pending": [],
+    "delivered": [("pending", "delivered")],
+    "accepted": [("pending", "delivered"), ("delivered", "accepted")],
+    "completed": [("pending", "delivered"), ("delivered", "accepted"), ("accepted", "completed")],
+    "cancelled": [("pending", "cancelled")],
+}
+
+
+def backfill_order_events(apps, schema_editor):
+    """Placement at created_at, then the moves the current status implies at updated_at."""
+    Order = apps.get_model("orders", "Order")
+    OrderEvent = apps.get_model("orders", "OrderEvent")
+    events = []
+    rows = Order.objects.values_list("pk", "status", "created_at", "updated_at").iterator(chunk_size=2000)
+    for pk, status, created_at, updated_at in rows:
+        events.append(OrderEvent(order_id=pk, to_status="pending", actor="buyer", created_at=created_at))
+        for from_status, to_status in IMPLIED_MOVES.get(status, []):
+            events.append(
+                OrderEvent(order_id=pk, from_status=from_status, to_status=to_status, created_at=updated_at)
+            )
+        if len(events) >= 5000:
+            OrderEvent.objects.bulk_create(events)
+            events = []
+    OrderEvent.objects.bulk_create(events)
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_cancelled_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, default='', max_length=30)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('delivered', 'Delivered'), ('accepted', 'Accepted'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=30)),
+                ('actor', models.CharField(blank=True, choices=[('buyer', 'Buyer'), ('seller', 'Seller'), ('system', 'System')], default='', max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='orders.order')),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['order', 'created_at'], name='orders_orde_order_i_4c5f76_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_order_events, migrations.RunPython.noop),
+    ]
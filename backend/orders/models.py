@@ -1,24 +1,84 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from decimal import Decimal
 from django.core.validators import MinValueValidator
+from django.dispatch import Signal
+from django.utils import timezone
 from gigs.models import Gig
 
 User = settings.AUTH_USER_MODEL
 
+# Sent inside the transaction of every successful status transition, single
+# or bulk, with ``orders`` (list of Order), ``from_status``, ``to_status`` and
+# ``actor`` (who made the move, when the caller says so)
+order_status_changed = Signal()
+
+
+class InvalidTransition(Exception):
+    pass
+
+
+class OrderQuerySet(models.QuerySet):
+    def transition(self, from_status, to_status, actor=None):
+        """
+        Move every order in this queryset that is still in ``from_status`` to
+        ``to_status`` with one conditional UPDATE, and return the orders that
+        were actually moved (rows changed concurrently are skipped).
+        """
+        if (from_status, to_status) not in Order.TRANSITIONS:
+            raise InvalidTransition(f"{from_status} -> {to_status}")
+        with transaction.atomic():
+            candidates = list(self.filter(status=from_status).values_list("pk", flat=True))
+            if not candidates:
+                return []
+            # The exact timestamp tells the rows this statement moved apart from
+            # rows another writer moved to the same status in the meantime
+            now = timezone.now()
+            Order.objects.filter(pk__in=candidates, status=from_status).update(
+                status=to_status, updated_at=now
+            )
+            orders = list(
+                Order.objects.filter(pk__in=candidates, status=to_status, updated_at=now)
+                .select_related("buyer", "seller", "gig")
+            )
+            if orders:
+                OrderEvent.record(orders, from_status, to_status, actor, at=now)
+                order_status_changed.send(
+                    sender=Order, orders=orders, from_status=from_status, to_status=to_status,
+                    actor=actor,
+                )
+        return orders
+
+
 class Order(models.Model):
     STATUS_PENDING = "pending"
     STATUS_DELIVERED = "delivered"
     STATUS_ACCEPTED = "accepted"
     STATUS_COMPLETED = "completed"
+    STATUS_CANCELLED = "cancelled"
 
     STATUS_CHOICES = [
         (STATUS_PENDING, "Pending"),
         (STATUS_DELIVERED, "Delivered"),
         (STATUS_ACCEPTED, "Accepted"),
         (STATUS_COMPLETED, "Completed"),
+        (STATUS_CANCELLED, "Cancelled"),
     ]
 
+    ACTOR_BUYER = "buyer"
+    ACTOR_SELLER = "seller"
+    ACTOR_SYSTEM = "system"
+
+    # (from, to) -> who may make the move
+    TRANSITIONS = {
+        (STATUS_PENDING, STATUS_DELIVERED): {ACTOR_SELLER},  # deliver
+        (STATUS_DELIVERED, STATUS_PENDING): {ACTOR_BUYER},  # reject delivery
+        # accept delivery; the system auto-accepts stale deliveries (sweep_stale_orders)
+        (STATUS_DELIVERED, STATUS_ACCEPTED): {ACTOR_BUYER, ACTOR_SYSTEM},
+        (STATUS_ACCEPTED, STATUS_COMPLETED): {ACTOR_SYSTEM},  # payment confirmed
+        (STATUS_PENDING, STATUS_CANCELLED): {ACTOR_SYSTEM},  # never delivered, expired
+    }
+
     buyer = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="orders_made"
     )
@@ -32,9 +92,162 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["buyer", "seller", "status"])]
+        # Inboxes filter on one party (and optionally status) and page by (-created_at, -id)
+        indexes = [
+            models.Index(fields=["seller", "-created_at", "-id"]),
+            models.Index(fields=["buyer", "-created_at", "-id"]),
+            models.Index(fields=["seller", "status", "-created_at", "-id"]),
+            # sweep_stale_orders: oldest orders sitting in one status
+            models.Index(fields=["status", "updated_at"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        # post_save receivers write notifications and outbox emails; keep them in the same transaction.
+        # Status changes go through transition(), not save().
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                OrderEvent.record([self], "", self.status, self.ACTOR_BUYER, at=self.created_at)
+
+    @classmethod
+    def allows(cls, from_status, to_status, actor):
+        """Whether ``actor`` may move an order from ``from_status`` to ``to_status``."""
+        return actor in cls.TRANSITIONS.get((from_status, to_status), ())
+
+    def actor(self, user):
+        if user.pk == self.seller_id:
+            return self.ACTOR_SELLER
+        if user.pk == self.buyer_id:
+            return self.ACTOR_BUYER
+        return None
+
+    def transition(self, to_status, actor=None):
+        """
+        Compare-and-set this order from its current (in-memory) status to
+        ``to_status`` in a single UPDATE. Returns False without side effects
+        if another writer changed the status first; the caller decides
+        whether that is a conflict or an already-applied retry.
+        """
+        from_status = self.status
+        if (from_status, to_status) not in self.TRANSITIONS:
+            raise InvalidTransition(f"{from_status} -> {to_status}")
+        now = timezone.now()
+        with transaction.atomic():
+            moved = Order.objects.filter(pk=self.pk, status=from_status).update(
+                status=to_status, updated_at=now
+            )
+            if not moved:
+                return False
+            self.status, self.updated_at = to_status, now
+            OrderEvent.record([self], from_status, to_status, actor, at=now)
+            order_status_changed.send(
+                sender=Order, orders=[self], from_status=from_status, to_status=to_status,
+                actor=actor,
+            )
+        return True
 
     def __str__(self):
         return f"Order #{self.pk} - {self.gig} - {self.buyer} -> {self.seller}"
+
+
+class OrderEvent(models.Model):
+    """
+    Append-only history of an order: one row when it is placed (empty
+    ``from_status``) and one per status transition, written in the same
+    transaction as the change. Rows are never updated.
+    """
+
+    ACTOR_CHOICES = [
+        (Order.ACTOR_BUYER, "Buyer"),
+        (Order.ACTOR_SELLER, "Seller"),
+        (Order.ACTOR_SYSTEM, "System"),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="events")
+    from_status = models.CharField(max_length=30, blank=True, default="")
+    to_status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES)
+    # Blank when unknown (events backfilled from orders that predate this table)
+    actor = models.CharField(max_length=10, choices=ACTOR_CHOICES, blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        # A timeline is one range scan; the newest event is one index probe
+        indexes = [models.Index(fields=["order", "created_at"])]
+
+    @classmethod
+    def record(cls, orders, from_status, to_status, actor, at):
+        cls.objects.bulk_create([
+            cls(order=order, from_status=from_status, to_status=to_status, actor=actor or "", created_at=at)
+            for order in orders
+        ])
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Order events are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status or '-'} -> {self.to_status}"
+
+
+class SellerDailyStats(models.Model):
+    """
+    Per-seller, per-day order rollup maintained incrementally by
+    orders.stats (order creation and status transitions) and rebuilt by
+    `manage.py rebuild_seller_stats`. Transition counters are booked on the
+    day the transition happened; revenue is booked when an order completes.
+    """
+
+    seller = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    date = models.DateField()
+    orders_placed = models.PositiveIntegerField(default=0)
+    orders_delivered = models.PositiveIntegerField(default=0)
+    orders_rejected = models.PositiveIntegerField(default=0)
+    orders_accepted = models.PositiveIntegerField(default=0)
+    orders_completed = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        ordering = ["seller", "date"]
+        constraints = [
+            models.UniqueConstraint(fields=["seller", "date"], name="unique_seller_daily_stats"),
+        ]
+
+    def __str__(self):
+        return f"{self.seller_id} @ {self.date}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Stored outcome of a request sent with an ``Idempotency-Key`` header
+    (see orders.idempotency). A retry with the same key and body is answered
+    from ``response_body`` instead of being executed again.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    key = models.CharField(max_length=255)
+    # sha256 of scope, method, path and request body: a reused key with a different request is rejected
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    response_body = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key_per_user"),
+        ]
+        indexes = [models.Index(fields=["created_at"])]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key}"
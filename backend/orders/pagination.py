@@ -0,0 +1,6 @@
+from fiverrBackend.utils.pagination import KeysetPagination
+
+
+class OrderPagination(KeysetPagination):
+    page_size = 25
+    ordering = ("-created_at", "-id")
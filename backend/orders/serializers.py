@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Order
+from .models import Order, OrderEvent
 from gigs.serializers import GigListSerializer
 from django.contrib.auth import get_user_model
 
@@ -16,25 +16,34 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         model = Order
         fields = ("id", "gig_id", "instructions")
 
-    def validate_gig_id(self, value):
+    def validate(self, attrs):
+        # The gig and its seller are fetched once here and reused by create(),
+        # the post_save receivers and the response
         from gigs.models import Gig
 
-        try:
-            Gig.objects.get(pk=value)
-        except Gig.DoesNotExist:
-            raise serializers.ValidationError("Gig does not exist.")
-        return value
+        gig = (
+            Gig.objects.select_related("seller")
+            .only(
+                "id", "slug", "title", "thumbnail", "price", "seller_id",
+                "seller__id", "seller__username", "seller__email",
+            )
+            .filter(pk=attrs["gig_id"])
+            .first()
+        )
+        if gig is None:
+            raise serializers.ValidationError({"gig_id": "Gig does not exist."})
+        request = self.context.get("request")
+        if request is not None and request.user.id == gig.seller_id:
+            raise serializers.ValidationError("Cannot order your own gig.")
+        attrs["gig"] = gig
+        return attrs
 
     def create(self, validated_data):
         request = self.context.get("request")
         user = request.user
-        from gigs.models import Gig
-
-        gig = Gig.objects.get(pk=validated_data["gig_id"])
         if not getattr(user, "is_authenticated", False):
             raise serializers.ValidationError("Authentication required.")
-        if user.id == gig.seller_id:
-            raise serializers.ValidationError("Cannot order your own gig.")
+        gig = validated_data["gig"]
         # create order using gig price snapshot
         order = Order.objects.create(
             buyer=user,
@@ -82,3 +91,62 @@ class OrderListSerializer(serializers.ModelSerializer):
     def get_is_seller(self, obj):
         request = self.context.get("request")
         return request.user == obj.seller
+
+
+class OrderGigSummarySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    slug = serializers.CharField()
+    title = serializers.CharField()
+    thumbnail = serializers.ImageField(use_url=True)
+
+
+class OrderPartySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    username = serializers.CharField()
+
+
+class OrderEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderEvent
+        fields = ("id", "from_status", "to_status", "actor", "created_at")
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Compact row for order lists. Reads only columns loaded by
+    ``OrderViewSet.list`` (one joined query): no nested rating/review data,
+    and ``is_buyer``/``is_seller`` and ``last_event`` come from queryset
+    annotations.
+    """
+
+    gig = OrderGigSummarySerializer(read_only=True, allow_null=True)
+    buyer = OrderPartySerializer(read_only=True)
+    seller = OrderPartySerializer(read_only=True)
+    is_buyer = serializers.BooleanField(read_only=True)
+    is_seller = serializers.BooleanField(read_only=True)
+    last_event = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = (
+            "id",
+            "gig",
+            "price",
+            "status",
+            "created_at",
+            "buyer",
+            "seller",
+            "is_buyer",
+            "is_seller",
+            "last_event",
+        )
+
+    def get_last_event(self, obj):
+        if getattr(obj, "last_event_at", None) is None:
+            return None
+        return {
+            "from_status": obj.last_event_from,
+            "to_status": obj.last_event_to,
+            "actor": obj.last_event_actor,
+            "created_at": serializers.DateTimeField().to_representation(obj.last_event_at),
+        }
@@ -1,104 +1,137 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from .models import Order
-from notifications.models import Notification
-from django.core.mail import send_mail
-from django.conf import settings
+from .models import Order, order_status_changed
+from notifications.models import Notification, OutboxMessage
+from notifications.badges import notifications_created
+from notifications.outbox import enqueue_email
+from .stats import record_order_placed, record_transition
 
 
 def send_notification_email(user, subject, message):
-    """Helper function to safely send emails if user has email."""
+    """
+    Queue an email if the user has an address. The row is written in the
+    order's transaction and sent later by `manage.py process_outbox`.
+    """
     if not user.email:
         return
-    send_mail(
-        subject=subject,
-        message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        fail_silently=True,
-    )
+    enqueue_email(user.email, subject, message)
 
 
 @receiver(post_save, sender=Order)
-def order_status_notifications(sender, instance, created, **kwargs):
-    if created:
-        # New order placed → notify seller
-        Notification.objects.create(
-            user=instance.seller,
-            type="order_placed",
-            message=f"You have a new order from {instance.buyer.username} for {instance.gig.title}."
-        )
-        send_notification_email(
-            instance.seller,
-            "New Order Received",
-            f"Hello {instance.seller.username}, you received a new order from {instance.buyer.username} "
-            f"for {instance.gig.title}."
-        )
+def order_placed_notifications(sender, instance, created, **kwargs):
+    # Status changes are announced by order_status_changed (see Order.transition)
+    if not created:
+        return
+    # New order placed → notify seller
+    Notification.objects.create(
+        user=instance.seller,
+        type="order_placed",
+        message=f"You have a new order from {instance.buyer.username} for {instance.gig.title}."
+    )
+    send_notification_email(
+        instance.seller,
+        "New Order Received",
+        f"Hello {instance.seller.username}, you received a new order from {instance.buyer.username} "
+        f"for {instance.gig.title}."
+    )
 
-    else:
-        # Delivered
-        if instance.status == Order.STATUS_DELIVERED:
-            Notification.objects.create(
-                user=instance.buyer,
-                type="order_delivered",
-                message=f"Your order {instance.id} has been delivered by {instance.seller.username}."
-            )
-            send_notification_email(
-                instance.buyer,
-                "Order Delivered",
-                f"Hello {instance.buyer.username}, your order {instance.id} has been delivered."
-            )
 
-        # Accepted
-        elif instance.status == Order.STATUS_ACCEPTED:
-            Notification.objects.create(
-                user=instance.seller,
-                type="order_accepted",
-                message=f"{instance.buyer.username} has accepted your delivery for order {instance.id}."
-            )
-            send_notification_email(
-                instance.seller,
+def status_messages(order, to_status, actor=None):
+    """(user, notification type, notification text, email subject, email body) per recipient."""
+    buyer, seller = order.buyer, order.seller
+    if to_status == Order.STATUS_ACCEPTED and actor == Order.ACTOR_SYSTEM:
+        return [
+            (
+                seller, "order_accepted",
+                f"Order {order.id} was accepted automatically after the review period.",
                 "Delivery Accepted",
-                f"Hello {instance.seller.username}, your delivery for order {instance.id} was accepted by "
-                f"{instance.buyer.username}."
+                f"Hello {seller.username}, your delivery for order {order.id} was accepted "
+                f"automatically because {buyer.username} did not respond in time.",
+            ),
+            (
+                buyer, "order_accepted",
+                f"Your order {order.id} was accepted automatically after the review period.",
+                "Order Accepted",
+                f"Hello {buyer.username}, the delivery for your order {order.id} was accepted "
+                f"automatically. You can now complete payment.",
+            ),
+        ]
+    if to_status == Order.STATUS_DELIVERED:
+        return [(
+            buyer, "order_delivered",
+            f"Your order {order.id} has been delivered by {seller.username}.",
+            "Order Delivered",
+            f"Hello {buyer.username}, your order {order.id} has been delivered.",
+        )]
+    if to_status == Order.STATUS_ACCEPTED:
+        return [(
+            seller, "order_accepted",
+            f"{buyer.username} has accepted your delivery for order {order.id}.",
+            "Delivery Accepted",
+            f"Hello {seller.username}, your delivery for order {order.id} was accepted by "
+            f"{buyer.username}.",
+        )]
+    # Rejected → goes back to pending
+    if to_status == Order.STATUS_PENDING:
+        return [(
+            seller, "order_rejected",
+            f"{buyer.username} rejected the delivery for order {order.id}.",
+            "Delivery Rejected",
+            f"Hello {seller.username}, {buyer.username} rejected your delivery "
+            f"for order {order.id}. Please deliver again.",
+        )]
+    # Expired before delivery
+    if to_status == Order.STATUS_CANCELLED:
+        return [
+            (
+                user, "order_cancelled",
+                f"Order {order.id} was cancelled because it was not delivered in time.",
+                "Order Cancelled",
+                f"Hello {user.username}, order {order.id} was cancelled because it was not "
+                f"delivered in time.",
             )
+            for user in (buyer, seller)
+        ]
+    # Completed (payment done)
+    if to_status == Order.STATUS_COMPLETED:
+        return [
+            (
+                buyer, "order_paid",
+                f"Payment completed for order {order.id}. Thank you!",
+                "Order Completed",
+                f"Hello {buyer.username}, your payment for order {order.id} has been processed successfully.",
+            ),
+            (
+                seller, "order_paid",
+                f"Payment received for order {order.id} from {buyer.username}.",
+                "Order Paid",
+                f"Hello {seller.username}, you have received payment for order {order.id} "
+                f"from {buyer.username}.",
+            ),
+        ]
+    return []
 
-        # Rejected → goes back to pending
-        elif instance.status == Order.STATUS_PENDING:
-            Notification.objects.create(
-                user=instance.seller,
-                type="order_rejected",
-                message=f"{instance.buyer.username} rejected the delivery for order {instance.id}."
-            )
-            send_notification_email(
-                instance.seller,
-                "Delivery Rejected",
-                f"Hello {instance.seller.username}, {instance.buyer.username} rejected your delivery "
-                f"for order {instance.id}. Please deliver again."
-            )
 
-        # Completed (payment done)
-        elif instance.status == Order.STATUS_COMPLETED:
-            Notification.objects.create(
-                user=instance.buyer,
-                type="order_paid",
-                message=f"Payment completed for order {instance.id}. Thank you!"
-            )
-            Notification.objects.create(
-                user=instance.seller,
-                type="order_paid",
-                message=f"Payment received for order {instance.id} from {instance.buyer.username}."
-            )
+@receiver(order_status_changed, sender=Order)
+def order_status_notifications(sender, orders, from_status, to_status, actor=None, **kwargs):
+    notifications, emails = [], []
+    for order in orders:
+        for user, kind, text, subject, body in status_messages(order, to_status, actor):
+            notifications.append(Notification(user=user, type=kind, message=text))
+            if user.email:
+                emails.append(OutboxMessage(recipient=user.email, subject=subject, body=body))
+    # One INSERT each, however many orders a bulk transition moved
+    Notification.objects.bulk_create(notifications)
+    OutboxMessage.objects.bulk_create(emails)
+    notifications_created(notifications)
 
-            # Emails for both buyer & seller
-            send_notification_email(
-                instance.buyer,
-                "Order Completed",
-                f"Hello {instance.buyer.username}, your payment for order {instance.id} has been processed successfully."
-            )
-            send_notification_email(
-                instance.seller,
-                "Order Paid",
-                f"Hello {instance.seller.username}, you have received payment for order {instance.id} "
-                f"from {instance.buyer.username}."
-            )
+
+@receiver(post_save, sender=Order)
+def seller_stats_order_placed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_order_placed(instance)
+
+
+@receiver(order_status_changed, sender=Order)
+def seller_stats_transition(sender, orders, from_status, to_status, **kwargs):
+    record_transition(orders, to_status)
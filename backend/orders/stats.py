@@ -0,0 +1,55 @@
+"""
+Incremental maintenance of SellerDailyStats.
+
+Each change is an upsert: insert the (seller, date) row if it is missing
+(ignoring the conflict if a concurrent writer got there first), then add
+the deltas with a single F() UPDATE, so concurrent writers never lose
+increments.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Order, SellerDailyStats
+
+# Counter bumped when an order moves into each status (delivered -> pending is a rejection)
+TRANSITION_COUNTERS = {
+    Order.STATUS_DELIVERED: "orders_delivered",
+    Order.STATUS_PENDING: "orders_rejected",
+    Order.STATUS_ACCEPTED: "orders_accepted",
+    Order.STATUS_COMPLETED: "orders_completed",
+}
+
+
+def apply_deltas(deltas):
+    """``deltas``: {(seller_id, date): {field: amount}}."""
+    if not deltas:
+        return
+    SellerDailyStats.objects.bulk_create(
+        [SellerDailyStats(seller_id=seller_id, date=day) for seller_id, day in deltas],
+        ignore_conflicts=True,
+    )
+    for (seller_id, day), fields in deltas.items():
+        SellerDailyStats.objects.filter(seller_id=seller_id, date=day).update(
+            **{field: F(field) + amount for field, amount in fields.items()}
+        )
+
+
+def record_order_placed(order):
+    day = timezone.localdate(order.created_at)
+    apply_deltas({(order.seller_id, day): {"orders_placed": 1}})
+
+
+def record_transition(orders, to_status):
+    counter = TRANSITION_COUNTERS.get(to_status)
+    if counter is None:
+        return
+    deltas = defaultdict(lambda: defaultdict(int))
+    for order in orders:
+        fields = deltas[(order.seller_id, timezone.localdate(order.updated_at))]
+        fields[counter] += 1
+        if to_status == Order.STATUS_COMPLETED:
+            fields["revenue"] += Decimal(order.price or 0)
+    apply_deltas(deltas)
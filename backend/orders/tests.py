@@ -1,3 +1,587 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gigs.models import Gig
+from notifications.models import Notification
+from payments.models import Payment
+from .models import IdempotencyKey, InvalidTransition, Order, OrderEvent, SellerDailyStats
+from .serializers import OrderCreateSerializer
+
+User = get_user_model()
+
+
+class OrderConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+        self.order = Order.objects.create(
+            buyer=self.buyer, seller=self.seller, gig=self.gig, price=self.gig.price
+        )
+        self.url = reverse("orders-detail", kwargs={"pk": self.order.pk})
+
+    def test_repeat_view_returns_304(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.order.status = Order.STATUS_DELIVERED
+        self.order.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Order.STATUS_DELIVERED)
+
+    def test_outsider_never_gets_304(self):
+        self.client.force_authenticate(self.buyer)
+        etag = self.client.get(self.url)["ETag"]
+        outsider = User.objects.create_user(
+            email="other@example.com", username="other", password="pass1234"
+        )
+        self.client.force_authenticate(outsider)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class OrderListTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+        buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        Order.objects.bulk_create(
+            Order(buyer=buyer, seller=self.seller, gig=self.gig, price=self.gig.price)
+            for _ in range(30)
+        )
+
+    def test_seller_page_is_one_query(self):
+        self.client.force_authenticate(self.seller)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("orders-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 25)
+        row = response.data["results"][0]
+        self.assertEqual(row["gig"]["slug"], self.gig.slug)
+        self.assertEqual(row["seller"], {"id": self.seller.id, "username": "seller"})
+        self.assertTrue(row["is_seller"])
+        self.assertFalse(row["is_buyer"])
+
+        rest = self.client.get(response.data["next"])
+        self.assertEqual(len(rest.data["results"]), 5)
+
+    def test_status_filter(self):
+        Order.objects.filter(pk__in=Order.objects.values("pk")[:3]).update(status=Order.STATUS_DELIVERED)
+        self.client.force_authenticate(self.seller)
+        response = self.client.get(reverse("orders-list"), {"status": "delivered"})
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get(reverse("orders-list"), {"status": "pending,delivered"})
+        self.assertEqual(len(response.data["results"]), 25)
+        response = self.client.get(reverse("orders-list"), {"status": "paid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deleted_gig_renders_as_null(self):
+        self.gig.delete()
+        self.client.force_authenticate(self.seller)
+        response = self.client.get(reverse("orders-list"))
+        self.assertIsNone(response.data["results"][0]["gig"])
+
+
+class OrderStateMachineTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+        self.order = Order.objects.create(
+            buyer=self.buyer, seller=self.seller, gig=self.gig, price=self.gig.price
+        )
+
+    def url(self, name):
+        return reverse(f"orders-{name}", kwargs={"pk": self.order.pk})
+
+    def test_transition_is_compare_and_set(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        self.assertTrue(self.order.transition(Order.STATUS_DELIVERED))
+        # A second writer that read the old status loses and fires nothing
+        self.assertFalse(stale.transition(Order.STATUS_DELIVERED))
+        self.assertEqual(Notification.objects.filter(type="order_delivered").count(), 1)
+        with self.assertRaises(InvalidTransition):
+            self.order.transition(Order.STATUS_COMPLETED)
+
+    def test_bulk_transition_returns_moved_orders(self):
+        other = Order.objects.create(
+            buyer=self.buyer, seller=self.seller, gig=self.gig, price=self.gig.price,
+            status=Order.STATUS_ACCEPTED,
+        )
+        moved = Order.objects.filter(seller=self.seller).transition(
+            Order.STATUS_PENDING, Order.STATUS_DELIVERED
+        )
+        self.assertEqual([o.pk for o in moved], [self.order.pk])
+        other.refresh_from_db()
+        self.assertEqual(other.status, Order.STATUS_ACCEPTED)
+        self.assertEqual(Notification.objects.filter(type="order_delivered").count(), 1)
+
+    def test_deliver_is_idempotent_and_role_checked(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.post(self.url("deliver")).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.seller)
+        self.assertEqual(self.client.post(self.url("deliver")).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(self.url("deliver")).status_code, status.HTTP_200_OK)
+        self.assertEqual(Notification.objects.filter(type="order_delivered").count(), 1)
+
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post(self.url("accept"))
+        self.assertEqual(response.data["status"], Order.STATUS_ACCEPTED)
+        response = self.client.post(self.url("reject"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lost_race_returns_409(self):
+        self.client.force_authenticate(self.seller)
+        # Simulate the buyer's concurrent move landing between our read and our UPDATE
+        original = Order.transition
+
+        def racing_transition(order, to_status, actor=None):
+            Order.objects.filter(pk=order.pk).update(status=Order.STATUS_ACCEPTED)
+            return original(order, to_status, actor=actor)
+
+        with mock.patch.object(Order, "transition", racing_transition):
+            response = self.client.post(self.url("deliver"))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_partial_update_follows_transition_table(self):
+        self.client.force_authenticate(self.seller)
+        response = self.client.patch(self.url("detail"), {"status": Order.STATUS_COMPLETED})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.patch(self.url("detail"), {"status": Order.STATUS_DELIVERED})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Order.STATUS_DELIVERED)
+
+
+class OrderPlacementTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com", username="seller", password="pass1234", is_seller=True
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+
+    def test_gig_is_read_once_and_response_is_compact(self):
+        self.client.force_authenticate(self.buyer)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("orders-list"), {"gig_id": self.gig.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        reads = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(reads), 1, reads)
+
+        self.assertEqual(response.data["gig"]["slug"], self.gig.slug)
+        self.assertEqual(response.data["seller"], {"id": self.seller.id, "username": "seller"})
+        self.assertTrue(response.data["is_buyer"])
+        self.assertEqual(response.data["last_event"]["to_status"], Order.STATUS_PENDING)
+        self.assertNotIn("rating", response.data["gig"])
+        self.assertTrue(Notification.objects.filter(user=self.seller, type="order_placed").exists())
+
+    def test_invalid_gigs_are_rejected(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post(reverse("orders-list"), {"gig_id": 999}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("gig_id", response.data)
+        self.client.force_authenticate(self.seller)
+        response = self.client.post(reverse("orders-list"), {"gig_id": self.gig.pk}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderEventTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+        self.order = Order.objects.create(
+            buyer=self.buyer, seller=self.seller, gig=self.gig, price=self.gig.price
+        )
+
+    def test_every_move_is_appended(self):
+        self.order.transition(Order.STATUS_DELIVERED, actor=Order.ACTOR_SELLER)
+        self.order.transition(Order.STATUS_PENDING, actor=Order.ACTOR_BUYER)
+        Order.objects.filter(pk=self.order.pk).transition(
+            Order.STATUS_PENDING, Order.STATUS_CANCELLED, actor=Order.ACTOR_SYSTEM
+        )
+        # A lost compare-and-set writes nothing
+        self.assertFalse(self.order.transition(Order.STATUS_DELIVERED))
+
+        self.client.force_authenticate(self.buyer)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("orders-timeline", kwargs={"pk": self.order.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(e["from_status"], e["to_status"], e["actor"]) for e in response.data],
+            [
+                ("", "pending", "buyer"),
+                ("pending", "delivered", "seller"),
+                ("delivered", "pending", "buyer"),
+                ("pending", "cancelled", "system"),
+            ],
+        )
+
+        event = OrderEvent.objects.first()
+        event.actor = "system"
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_timeline_is_for_parties_only(self):
+        outsider = User.objects.create_user(
+            email="x@example.com", username="outsider", password="pass1234"
+        )
+        self.client.force_authenticate(outsider)
+        response = self.client.get(reverse("orders-timeline", kwargs={"pk": self.order.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_shows_last_event_in_one_query(self):
+        self.order.transition(Order.STATUS_DELIVERED, actor=Order.ACTOR_SELLER)
+        self.client.force_authenticate(self.seller)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("orders-list"))
+        last_event = response.data["results"][0]["last_event"]
+        self.assertEqual(last_event["from_status"], Order.STATUS_PENDING)
+        self.assertEqual(last_event["to_status"], Order.STATUS_DELIVERED)
+        self.assertEqual(last_event["actor"], Order.ACTOR_SELLER)
+
+    def test_rebuild_counts_rejections_from_events(self):
+        self.order.transition(Order.STATUS_DELIVERED, actor=Order.ACTOR_SELLER)
+        self.order.transition(Order.STATUS_PENDING, actor=Order.ACTOR_BUYER)
+        SellerDailyStats.objects.all().delete()
+        call_command("rebuild_seller_stats", stdout=StringIO())
+        stats = SellerDailyStats.objects.get(seller=self.seller)
+        self.assertEqual(
+            (stats.orders_placed, stats.orders_delivered, stats.orders_rejected), (1, 1, 1)
+        )
+
+
+class SweepStaleOrdersTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com", username="seller", password="pass1234", is_seller=True
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+
+    def make_order(self, status_value, days_old):
+        order = Order.objects.create(
+            buyer=self.buyer, seller=self.seller, gig=self.gig, price=self.gig.price
+        )
+        Order.objects.filter(pk=order.pk).update(
+            status=status_value, updated_at=timezone.now() - timedelta(days=days_old)
+        )
+        return order
+
+    def sweep(self, *args):
+        out = StringIO()
+        call_command("sweep_stale_orders", *args, stdout=out)
+        return out.getvalue()
+
+    def test_stale_orders_are_accepted_or_cancelled(self):
+        stale_delivery = [self.make_order(Order.STATUS_DELIVERED, 5) for _ in range(3)]
+        fresh_delivery = self.make_order(Order.STATUS_DELIVERED, 1)
+        stale_pending = self.make_order(Order.STATUS_PENDING, 20)
+        fresh_pending = self.make_order(Order.STATUS_PENDING, 2)
+
+        output = self.sweep("--chunk-size", "2")
+        self.assertIn("Marked 3 order(s) accepted.", output)
+        self.assertIn("Marked 1 order(s) cancelled.", output)
+
+        statuses = dict(Order.objects.values_list("pk", "status"))
+        for order in stale_delivery:
+            self.assertEqual(statuses[order.pk], Order.STATUS_ACCEPTED)
+        self.assertEqual(statuses[fresh_delivery.pk], Order.STATUS_DELIVERED)
+        self.assertEqual(statuses[stale_pending.pk], Order.STATUS_CANCELLED)
+        self.assertEqual(statuses[fresh_pending.pk], Order.STATUS_PENDING)
+
+        # Both parties hear about each automatic move
+        accepted = Notification.objects.filter(type="order_accepted")
+        self.assertEqual(accepted.filter(user=self.seller).count(), 3)
+        self.assertEqual(accepted.filter(user=self.buyer).count(), 3)
+        self.assertEqual(Notification.objects.filter(type="order_cancelled").count(), 2)
+        # Auto-accepted orders count towards the seller's stats
+        self.assertEqual(SellerDailyStats.objects.get(seller=self.seller).orders_accepted, 3)
+
+    def test_dry_run_changes_nothing(self):
+        order = self.make_order(Order.STATUS_DELIVERED, 5)
+        output = self.sweep("--dry-run")
+        self.assertIn("Would mark 1 order(s) accepted.", output)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.STATUS_DELIVERED)
+
+    def test_users_cannot_cancel_orders(self):
+        order = self.make_order(Order.STATUS_PENDING, 0)
+        self.client.force_authenticate(self.buyer)
+        response = self.client.patch(
+            reverse("orders-detail", kwargs={"pk": order.pk}), {"status": Order.STATUS_CANCELLED}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class SellerDailyStatsTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+
+    def complete(self, price):
+        order = Order.objects.create(buyer=self.buyer, seller=self.seller, gig=self.gig, price=price)
+        for to_status in [Order.STATUS_DELIVERED, Order.STATUS_ACCEPTED, Order.STATUS_COMPLETED]:
+            order.transition(to_status)
+        return order
+
+    def test_transitions_update_rollup(self):
+        self.complete("25.00")
+        self.complete("75.00")
+        Order.objects.create(buyer=self.buyer, seller=self.seller, gig=self.gig, price="10.00")
+
+        stats = SellerDailyStats.objects.get(seller=self.seller)
+        self.assertEqual(stats.orders_placed, 3)
+        self.assertEqual(stats.orders_delivered, 2)
+        self.assertEqual(stats.orders_completed, 2)
+        self.assertEqual(stats.revenue, Decimal("100.00"))
+
+        self.client.force_authenticate(self.seller)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("orders-dashboard"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        totals = response.data["totals"]
+        self.assertEqual(totals["revenue"], Decimal("100.00"))
+        self.assertEqual(totals["average_order_value"], Decimal("50.00"))
+        self.assertEqual(totals["completion_rate"], round(2 / 3, 4))
+        self.assertEqual(len(response.data["daily"]), 1)
+
+        response = self.client.get(reverse("orders-dashboard"), {"start": "2000-01-01", "end": "2000-01-31"})
+        self.assertEqual(response.data["totals"]["orders_placed"], 0)
+        self.assertIsNone(response.data["totals"]["completion_rate"])
+
+    def test_dashboard_is_for_sellers(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get(reverse("orders-dashboard")).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(self.seller)
+        response = self.client.get(reverse("orders-dashboard"), {"start": "2025-02-30"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_matches_incremental(self):
+        self.complete("25.00")
+        Order.objects.create(buyer=self.buyer, seller=self.seller, gig=self.gig, price="10.00")
+        expected = list(SellerDailyStats.objects.values())
+        SellerDailyStats.objects.update(orders_placed=0, revenue=0)
+        call_command("rebuild_seller_stats", stdout=StringIO())
+        rebuilt = list(SellerDailyStats.objects.values())
+        for row in expected + rebuilt:
+            row.pop("id")
+        self.assertEqual(rebuilt, expected)
+
+
+class OrderExportTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo, design", description="d", price="25.00"
+        )
+        self.orders = [
+            Order.objects.create(buyer=self.buyer, seller=self.seller, gig=self.gig, price="25.00")
+            for _ in range(3)
+        ]
+        Payment.objects.create(order=self.orders[0], amount="25.00", status="succeeded")
+        self.client.force_authenticate(self.seller)
+
+    def test_csv_export_streams_joined_rows(self):
+        response = self.client.get(reverse("orders-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        lines = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        header, rows = lines[0], lines[1:]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(header[0], "id")
+        by_id = {row[0]: dict(zip(header, row)) for row in rows}
+        first = by_id[str(self.orders[0].pk)]
+        self.assertEqual(first["gig__title"], "Logo, design")
+        self.assertEqual(first["payment__status"], "succeeded")
+        self.assertEqual(by_id[str(self.orders[1].pk)]["payment__status"], "")
+
+    def test_jsonl_export_and_filters(self):
+        Order.objects.filter(pk=self.orders[0].pk).update(status=Order.STATUS_DELIVERED)
+        response = self.client.get(reverse("orders-export"), {"as": "jsonl", "status": "delivered"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(row["id"], self.orders[0].pk)
+        self.assertEqual(row["price"], "25.00")
+
+        response = self.client.get(reverse("orders-export"), {"as": "xlsx"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OrderIdempotencyTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", username="buyer", password="pass1234"
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller, title="Logo design", description="d", price="25.00"
+        )
+        self.client.force_authenticate(self.buyer)
+        self.url = reverse("orders-list")
+
+    def post(self, key, data=None):
+        return self.client.post(
+            self.url, data or {"gig_id": self.gig.pk}, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_without_creating(self):
+        first = self.post("abc")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(1):
+            retry = self.post("abc")
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(json.loads(retry.content)["id"], first.data["id"])
+        self.assertEqual(Order.objects.count(), 1)
+
+        self.assertEqual(self.post("other").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_for_different_body_is_rejected(self):
+        self.post("abc")
+        response = self.post("abc", {"gig_id": self.gig.pk, "instructions": "rush"})
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_server_errors_are_not_stored(self):
+        with mock.patch(
+            "orders.views.OrderCreateSerializer.save", side_effect=RuntimeError("db down")
+        ):
+            with self.assertRaises(RuntimeError):
+                self.post("abc")
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post("abc").status_code, status.HTTP_201_CREATED)
+
+    def test_duplicate_during_the_first_request_conflicts(self):
+        save = OrderCreateSerializer.save
+        seen = {}
+
+        def save_with_duplicate(serializer, **kwargs):
+            # The key is claimed (and, outside tests, committed) before the view runs
+            seen["claim"] = IdempotencyKey.objects.values_list("status_code", flat=True).get()
+            seen["duplicate"] = self.post("abc").status_code
+            return save(serializer, **kwargs)
+
+        with mock.patch("orders.views.OrderCreateSerializer.save", save_with_duplicate):
+            self.assertEqual(self.post("abc").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(seen, {"claim": None, "duplicate": status.HTTP_409_CONFLICT})
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_abandoned_claim_is_reclaimed_after_the_lease(self):
+        # A claim whose process died before storing a response
+        raw = json.dumps(["orders.create", "POST", self.url, {"gig_id": self.gig.pk}], sort_keys=True)
+        IdempotencyKey.objects.create(
+            user=self.buyer, key="abc", fingerprint=hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        )
+        self.assertEqual(self.post("abc").status_code, status.HTTP_409_CONFLICT)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=2))
+        response = self.post("abc")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_expired_key_runs_again(self):
+        self.post("abc")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertNotIn("Idempotent-Replayed", self.post("abc"))
+        self.assertEqual(Order.objects.count(), 2)
@@ -1,12 +1,75 @@
+import csv
+import json
+from datetime import timedelta
+from decimal import Decimal
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Order
-from .serializers import OrderCreateSerializer, OrderListSerializer
+from .models import Order, OrderEvent, SellerDailyStats
+from .serializers import (
+    OrderCreateSerializer, OrderEventSerializer, OrderListSerializer, OrderSummarySerializer,
+)
+from .pagination import OrderPagination
+from .idempotency import idempotent
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.db.models import BooleanField, ExpressionWrapper, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.shortcuts import get_object_or_404
 
-from .serializers import OrderCreateSerializer
+from fiverrBackend.utils.conditional import conditional_response, make_etag, set_validators
+
+
+# Order, payment and review columns, read in one LEFT JOINed pass
+EXPORT_COLUMNS = (
+    "id", "created_at", "updated_at", "status", "price",
+    "gig__slug", "gig__title", "buyer__username", "seller__username",
+    "payment__status", "payment__amount", "payment__currency", "payment__stripe_payment_intent",
+    "review__rating", "review__comment",
+)
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands back the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _render_jsonl(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", _render_csv),
+    "jsonl": ("application/x-ndjson", _render_jsonl),
+}
+
+
+def date_param(request, name):
+    """Parse an optional YYYY-MM-DD query param; raises ValueError if malformed."""
+    raw = request.query_params.get(name, "")
+    if not raw:
+        return None
+    value = parse_date(raw)
+    if value is None:
+        raise ValueError(raw)
+    return value
+
 
 class OrderViewSet(viewsets.GenericViewSet):
     """
@@ -18,44 +81,135 @@ class OrderViewSet(viewsets.GenericViewSet):
 
     queryset = Order.objects.all()
     permission_classes = [IsAuthenticated]
-    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
-    def deliver(self, request, pk=None):
-        order = self.get_object()
+    pagination_class = OrderPagination
 
-        # Only seller can deliver
-        if order.seller != request.user:
-            return Response({"detail": "Only the seller can deliver this order."}, status=403)
-
-        if order.status != Order.STATUS_PENDING:
-            return Response({"detail": "Order must be pending to be delivered."}, status=400)
-
-        order.status = Order.STATUS_DELIVERED
-        order.save(update_fields=["status", "updated_at"])
+    def _transition(self, request, order, to_status, serializer_class):
+        """
+        Compare-and-set ``order`` to ``to_status`` (permissions already checked).
+        A retry of a move that already happened returns 200 with the current
+        order; losing the race to a different concurrent move returns 409.
+        """
+        if order.status == to_status or order.transition(to_status, actor=order.actor(request.user)):
+            return Response(serializer_class(order, context={"request": request}).data)
+        order.refresh_from_db()
+        if order.status == to_status:
+            return Response(serializer_class(order, context={"request": request}).data)
+        return Response(
+            {"detail": f"Order was changed concurrently and is now {order.status}."},
+            status=status.HTTP_409_CONFLICT,
+        )
 
-        return Response(OrderCreateSerializer(order).data)
+    def _action(self, request, to_status, actor, forbidden, invalid, serializer_class=OrderListSerializer):
+        order = self.get_object()
+        if order.actor(request.user) != actor:
+            return Response({"detail": forbidden}, status=status.HTTP_403_FORBIDDEN)
+        if order.status != to_status and not Order.allows(order.status, to_status, actor):
+            return Response({"detail": invalid}, status=status.HTTP_400_BAD_REQUEST)
+        return self._transition(request, order, to_status, serializer_class)
 
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def deliver(self, request, pk=None):
+        return self._action(
+            request,
+            Order.STATUS_DELIVERED,
+            Order.ACTOR_SELLER,
+            forbidden="Only the seller can deliver this order.",
+            invalid="Order must be pending to be delivered.",
+            serializer_class=OrderCreateSerializer,
+        )
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def reject(self, request, pk=None):
-        order = self.get_object()
-        if request.user != order.buyer:
-            return Response({"detail": "Only buyer can reject"}, status=status.HTTP_403_FORBIDDEN)
-        order.status = Order.STATUS_PENDING
-        order.save(update_fields=["status", "updated_at"])
-        return Response(OrderListSerializer(order, context={"request": request}).data)
+        return self._action(
+            request,
+            Order.STATUS_PENDING,
+            Order.ACTOR_BUYER,
+            forbidden="Only buyer can reject",
+            invalid="Only a delivered order can be rejected",
+        )
 
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def accept(self, request, pk=None):
-        order = self.get_object()
-        if request.user != order.buyer:
-            return Response({"detail": "Only buyer can accept"}, status=status.HTTP_403_FORBIDDEN)
-        if order.status != Order.STATUS_DELIVERED:
-            return Response({"detail": "Order must be delivered first"}, status=status.HTTP_400_BAD_REQUEST)
-        order.status = Order.STATUS_ACCEPTED
-        order.save(update_fields=["status", "updated_at"])
-        return Response(OrderListSerializer(order, context={"request": request}).data)
-
-    
+        return self._action(
+            request,
+            Order.STATUS_ACCEPTED,
+            Order.ACTOR_BUYER,
+            forbidden="Only buyer can accept",
+            invalid="Order must be delivered first",
+        )
+
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """The order's full event history, oldest first: one range scan on (order, created_at)."""
+        parties = get_object_or_404(Order.objects.values("buyer_id", "seller_id"), pk=pk)
+        if request.user.pk not in (parties["buyer_id"], parties["seller_id"]):
+            return Response({"detail": "Not authorized."}, status=status.HTTP_403_FORBIDDEN)
+        events = OrderEvent.objects.filter(order_id=pk).order_by("created_at", "id")
+        return Response(OrderEventSerializer(events, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream the user's orders (with payment and review columns) as CSV or,
+        with ?as=jsonl, JSON lines. Honours ?status=. Rows are read through a
+        chunked cursor and written as they arrive, so memory use does not
+        grow with the size of the history.
+        """
+        output = request.query_params.get("as", "csv")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({"as": f"Choose one of: {', '.join(EXPORT_FORMATS)}."})
+        rows = (
+            self.filter_status(self.get_queryset())
+            .order_by("-created_at", "-id")
+            .values_list(*EXPORT_COLUMNS)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        content_type, render = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(render(rows), content_type=content_type)
+        filename = f"orders-{timezone.localdate():%Y%m%d}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=["get"])
+    def dashboard(self, request):
+        """
+        Seller earnings over ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: last 30 days),
+        summed from the daily rollup rather than from orders.
+        """
+        if not getattr(request.user, "is_seller", False):
+            return Response({"detail": "Only sellers have a dashboard."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            end = date_param(request, "end") or timezone.localdate()
+            start = date_param(request, "start") or end - timedelta(days=29)
+        except ValueError:
+            return Response({"detail": "Dates must be valid YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end:
+            return Response({"detail": "start must not be after end."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # One row per active day: a year-long range sums at most 366 rows
+        rows = SellerDailyStats.objects.filter(seller=request.user, date__range=(start, end))
+        counters = (
+            "orders_placed", "orders_delivered", "orders_rejected",
+            "orders_accepted", "orders_completed", "revenue",
+        )
+        totals = rows.aggregate(**{
+            name: Coalesce(Sum(name), 0, output_field=SellerDailyStats._meta.get_field(name))
+            for name in counters
+        })
+        completed = totals["orders_completed"]
+        totals["average_order_value"] = (
+            (totals["revenue"] / completed).quantize(Decimal("0.01")) if completed else None
+        )
+        totals["completion_rate"] = (
+            round(completed / totals["orders_placed"], 4) if totals["orders_placed"] else None
+        )
+        return Response({
+            "start": start,
+            "end": end,
+            "totals": totals,
+            "daily": list(rows.order_by("date").values("date", *counters)),
+        })
+
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
@@ -69,78 +223,110 @@ class OrderViewSet(viewsets.GenericViewSet):
         # buyers see their own orders
         return Order.objects.filter(buyer=user)
 
+    @idempotent("orders.create")
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
-        out_serializer = OrderListSerializer(order, context={"request": request})
+        # Compact list row, built from objects already in memory: the caller
+        # is the buyer and the only event so far is the placement
+        order.is_buyer, order.is_seller = True, False
+        order.last_event_from, order.last_event_to = "", order.status
+        order.last_event_actor, order.last_event_at = Order.ACTOR_BUYER, order.created_at
+        out_serializer = OrderSummarySerializer(order, context={"request": request})
         return Response(out_serializer.data, status=status.HTTP_201_CREATED)
 
+    def filter_status(self, queryset):
+        """Apply ?status=pending or ?status=pending,delivered."""
+        raw = self.request.query_params.get("status", "")
+        statuses = [value for value in raw.split(",") if value]
+        if not statuses:
+            return queryset
+        unknown = sorted(set(statuses) - {choice for choice, _ in Order.STATUS_CHOICES})
+        if unknown:
+            raise ValidationError({"status": f"Unknown status: {', '.join(unknown)}."})
+        return queryset.filter(status__in=statuses)
+
     def list(self, request, *args, **kwargs):
-        qs = self.get_queryset().select_related("gig", "buyer", "seller")
+        # One joined query per page: only the columns OrderSummarySerializer reads.
+        # The newest event comes from correlated subqueries on the (order, created_at) index.
+        user_id = request.user.pk
+        last_event = OrderEvent.objects.filter(order=OuterRef("pk")).order_by("-created_at", "-id")
+        qs = (
+            self.filter_status(self.get_queryset())
+            .select_related("gig", "buyer", "seller")
+            .only(
+                "id", "price", "status", "created_at", "buyer_id", "seller_id",
+                "gig__id", "gig__slug", "gig__title", "gig__thumbnail",
+                "buyer__id", "buyer__username", "seller__id", "seller__username",
+            )
+            .annotate(
+                is_buyer=ExpressionWrapper(Q(buyer_id=user_id), output_field=BooleanField()),
+                is_seller=ExpressionWrapper(Q(seller_id=user_id), output_field=BooleanField()),
+                **{
+                    f"last_event_{name}": Subquery(last_event.values(field)[:1])
+                    for name, field in (
+                        ("from", "from_status"), ("to", "to_status"),
+                        ("actor", "actor"), ("at", "created_at"),
+                    )
+                },
+            )
+        )
         page = self.paginate_queryset(qs)
         if page is not None:
-            serializer = OrderListSerializer(
+            serializer = OrderSummarySerializer(
                 page, many=True, context={"request": request}
             )
             return self.get_paginated_response(serializer.data)
-        serializer = OrderListSerializer(qs, many=True, context={"request": request})
+        serializer = OrderSummarySerializer(qs, many=True, context={"request": request})
         return Response(serializer.data)
 
     def retrieve(self, request, pk=None):
-        obj = get_object_or_404(Order, pk=pk)
+        # Cheap precheck: participants and timestamps only, so a repeat view
+        # is answered with 304 before the order and its relations are loaded
+        stamp = get_object_or_404(
+            Order.objects.values(
+                "buyer_id", "seller_id", "updated_at",
+                "gig__updated_at", "gig__rating_sum", "gig__review_count",
+            ),
+            pk=pk,
+        )
         # ensure buyer or seller only can view
-        if request.user != obj.buyer and request.user != obj.seller:
+        if request.user.pk not in (stamp["buyer_id"], stamp["seller_id"]):
             return Response(
                 {"detail": "Not authorized."}, status=status.HTTP_403_FORBIDDEN
             )
+        # gig is nullable (SET_NULL)
+        last_modified = max(filter(None, (stamp["updated_at"], stamp["gig__updated_at"])))
+        etag = make_etag("order", request.get_host(), pk, request.user.pk, *stamp.values())
+        not_modified = conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        obj = get_object_or_404(Order.objects.select_related("gig", "buyer", "seller"), pk=pk)
         serializer = OrderListSerializer(obj, context={"request": request})
-        return Response(serializer.data)
+        return set_validators(Response(serializer.data), etag=etag, last_modified=last_modified)
 
     def partial_update(self, request, pk=None):
         """
-        Allow limited status changes:
-        - seller: paid -> in_progress -> delivered
-        - buyer: pending -> cancelled, delivered -> completed
+        Allow status changes listed in Order.TRANSITIONS for the caller's role:
+        - seller: pending -> delivered
+        - buyer: delivered -> pending (reject), delivered -> accepted
+        (accepted -> completed is made by the payment flow; stale orders are
+        auto-accepted or cancelled by `manage.py sweep_stale_orders`.)
         """
         obj = get_object_or_404(Order, pk=pk)
-        user = request.user
         new_status = request.data.get("status")
-        allowed = False
-
-        if user == obj.seller:
-            if (
-                obj.status == Order.STATUS_PAID
-                and new_status == Order.STATUS_IN_PROGRESS
-            ):
-                allowed = True
-            elif (
-                obj.status == Order.STATUS_IN_PROGRESS
-                and new_status == Order.STATUS_DELIVERED
-            ):
-                allowed = True
-
-        elif user == obj.buyer:
-            if (
-                obj.status == Order.STATUS_PENDING
-                and new_status == Order.STATUS_CANCELLED
-            ):
-                allowed = True
-            elif (
-                obj.status == Order.STATUS_DELIVERED
-                and new_status == Order.STATUS_COMPLETED
-            ):
-                allowed = True
+        actor = obj.actor(request.user)
 
+        allowed = actor is not None and (
+            new_status == obj.status or Order.allows(obj.status, new_status, actor)
+        )
         if not allowed:
             return Response(
                 {"detail": "Not allowed to set this status."},
                 status=status.HTTP_403_FORBIDDEN,
             )
-
-        obj.status = new_status
-        obj.save(update_fields=["status", "updated_at"])
-        serializer = OrderListSerializer(obj, context={"request": request})
-        return Response(serializer.data)
+        return self._transition(request, obj, new_status, OrderListSerializer)
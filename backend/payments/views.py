@@ -4,6 +4,7 @@ from django.http import HttpResponse, JsonResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
+from orders.idempotency import idempotent
 from orders.models import Order
 from .models import Payment
 import stripe
@@ -14,9 +15,17 @@ from rest_framework.response import Response
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
+def complete_paid_order(order):
+    """Move a paid order from accepted to completed; safe to call more than once."""
+    if order.status != Order.STATUS_ACCEPTED:
+        return False
+    return order.transition(Order.STATUS_COMPLETED, actor=Order.ACTOR_SYSTEM)
+
+
 class CreateCheckoutSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent("payments.checkout_session")
     def post(self, request):
         order_id = request.data.get("order_id")
         if not order_id:
@@ -121,9 +130,9 @@ class StripeWebhookView(APIView):
                 update_fields=["stripe_session_id", "stripe_payment_intent", "status"]
             )
 
-            # payments/views.py → StripeWebhookView
-            order.status = Order.STATUS_COMPLETED
-            order.save(update_fields=["status", "updated_at"])
+            # Compare-and-set: if PaymentVerifyView (or a redelivered event) already
+            # completed the order, this is a no-op and side effects don't fire twice
+            complete_paid_order(order)
 
             # You may also notify seller via email / create activity logs here
 
@@ -192,9 +201,7 @@ class PaymentVerifyView(APIView):
                         ]
                     )
 
-                    if order.status == Order.STATUS_ACCEPTED and session.payment_status in ["paid", "succeeded"]:
-                        order.status = Order.STATUS_COMPLETED
-                        order.save(update_fields=["status", "updated_at"])
+                    complete_paid_order(order)
 
 
             return Response(
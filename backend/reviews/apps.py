@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        # Keep Gig rating aggregates in sync with review writes
+        import reviews.signals
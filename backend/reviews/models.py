@@ -1,5 +1,5 @@
 # backend/reviews/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from gigs.models import Gig
@@ -66,5 +66,11 @@ class Review(models.Model):
             
         if self.order.gig != self.gig:
             raise ValueError("Order must be for the gig being reviewed")
-            
-        super().save(*args, **kwargs)
\ No newline at end of file
+
+        # Gig rating aggregates are updated by signals inside the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
\ No newline at end of file
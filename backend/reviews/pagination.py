@@ -0,0 +1,7 @@
+from fiverrBackend.utils.pagination import KeysetPagination
+
+
+class ReviewPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,49 @@
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Review
+from gigs.models import Gig
+from gigs.cache import invalidate_gig_ids
+
+
+def adjust_gig_rating(gig_id, rating_delta, count_delta):
+    """Apply a delta to a gig's denormalized rating columns in a single UPDATE."""
+    if not gig_id or (not rating_delta and not count_delta):
+        return
+    Gig.objects.filter(pk=gig_id).update(
+        rating_sum=F("rating_sum") + rating_delta,
+        review_count=F("review_count") + count_delta,
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    # Stash the stored gig/rating so post_save can apply the difference on edits
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk).values_list("gig_id", "rating").first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_gig_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if created or previous is None:
+        adjust_gig_rating(instance.gig_id, instance.rating, 1)
+        invalidate_gig_ids([instance.gig_id])
+        return
+    old_gig_id, old_rating = previous
+    if old_gig_id == instance.gig_id:
+        adjust_gig_rating(instance.gig_id, instance.rating - old_rating, 0)
+    else:
+        adjust_gig_rating(old_gig_id, -old_rating, -1)
+        adjust_gig_rating(instance.gig_id, instance.rating, 1)
+    # Embedded review text changes the detail page even when the rating doesn't
+    invalidate_gig_ids({old_gig_id, instance.gig_id})
+
+
+@receiver(post_delete, sender=Review)
+def update_gig_rating_on_delete(sender, instance, **kwargs):
+    adjust_gig_rating(instance.gig_id, -instance.rating, -1)
+    invalidate_gig_ids([instance.gig_id])
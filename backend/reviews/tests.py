@@ -1,3 +1,146 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from gigs.models import Gig
+from orders.models import Order
+from .models import Review
+
+User = get_user_model()
+
+
+class GigRatingAggregateTestCase(APITestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user(
+            email="seller@example.com",
+            username="seller",
+            password="pass1234",
+            is_seller=True,
+            role="seller",
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com",
+            username="buyer",
+            password="pass1234",
+        )
+        self.gig = Gig.objects.create(
+            seller=self.seller,
+            title="Logo design",
+            description="desc",
+            price="25.00",
+        )
+
+    def completed_order(self):
+        return Order.objects.create(
+            buyer=self.buyer,
+            seller=self.seller,
+            gig=self.gig,
+            price=self.gig.price,
+            status=Order.STATUS_COMPLETED,
+        )
+
+    def review(self, rating):
+        return Review.objects.create(
+            reviewer=self.buyer,
+            gig=self.gig,
+            order=self.completed_order(),
+            rating=rating,
+            comment="ok",
+        )
+
+    def test_aggregates_follow_create_edit_delete(self):
+        first = self.review(5)
+        self.review(3)
+        self.gig.refresh_from_db()
+        self.assertEqual((self.gig.rating_sum, self.gig.review_count), (8, 2))
+        self.assertEqual(self.gig.average_rating, 4.0)
+
+        first.rating = 1
+        first.save()
+        self.gig.refresh_from_db()
+        self.assertEqual((self.gig.rating_sum, self.gig.review_count), (4, 2))
+
+        first.delete()
+        self.gig.refresh_from_db()
+        self.assertEqual((self.gig.rating_sum, self.gig.review_count), (3, 1))
+
+    def test_gig_edit_keeps_aggregates_written_meanwhile(self):
+        stale = Gig.objects.get(pk=self.gig.pk)
+        self.review(4)
+        Gig.objects.filter(pk=self.gig.pk).update(thumbnail_variants={"source": "thumb.png"})
+        stale.title = "Renamed"
+        stale.save()
+        self.gig.refresh_from_db()
+        self.assertEqual(self.gig.title, "Renamed")
+        self.assertEqual((self.gig.rating_sum, self.gig.review_count), (4, 1))
+        self.assertEqual(self.gig.thumbnail_variants, {"source": "thumb.png"})
+
+    def test_gig_list_reads_denormalized_aggregates(self):
+        self.review(4)
+        url = reverse("gig-list")
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        gig = response.data["results"][0]
+        self.assertEqual(gig["average_rating"], 4.0)
+        self.assertEqual(gig["total_reviews"], 1)
+
+    def test_reconcile_command_repairs_drift(self):
+        self.review(4)
+        Gig.objects.filter(pk=self.gig.pk).update(rating_sum=0, review_count=7)
+        out = StringIO()
+        call_command("reconcile_gig_ratings", stdout=out)
+        self.gig.refresh_from_db()
+        self.assertEqual((self.gig.rating_sum, self.gig.review_count), (4, 1))
+        self.assertIn("1 gig(s)", out.getvalue())
+
+    def test_gig_detail_embeds_first_page_of_reviews(self):
+        for rating in [5, 4, 3, 5, 4, 2, 1]:
+            self.review(rating)
+        response = self.client.get(reverse("gig-detail", kwargs={"slug": self.gig.slug}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["reviews"]), 5)
+        self.assertTrue(response.data["has_more_reviews"])
+        self.assertEqual(response.data["total_reviews"], 7)
+        self.assertTrue(response.data["reviews_url"].endswith(f"/api/gigs/{self.gig.slug}/reviews/"))
+
+        page = self.client.get(response.data["reviews_url"], {"page_size": 5})
+        self.assertEqual(len(page.data["results"]), 5)
+        rest = self.client.get(page.data["next"])
+        self.assertEqual(len(rest.data["results"]), 2)
+        self.assertIsNone(rest.data["next"])
+
+    def test_gig_list_query_count_ignores_reviews(self):
+        self.review(5)
+        url = reverse("gig-list")
+        # Every review write invalidates the cached page, so this measures a cold render
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        for rating in [4, 3, 2]:
+            self.review(rating)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data["results"][0]["total_reviews"], 4)
+
+    def test_reviews_support_conditional_get(self):
+        self.review(5)
+        urls = [
+            reverse("gig-reviews", kwargs={"gig_slug": self.gig.slug}),
+            reverse("gig-review-stats", kwargs={"gig_slug": self.gig.slug}),
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            etag = response["ETag"]
+            self.assertTrue(response.has_header("Last-Modified"))
+            # Only the validator query runs before answering 304
+            with self.assertNumQueries(1):
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.review(2)
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
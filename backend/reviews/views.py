@@ -3,7 +3,8 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Max, Q
+from django.http import Http404
 
 from .models import Review
 from .serializers import (
@@ -11,10 +12,30 @@ from .serializers import (
     ReviewDisplaySerializer, 
     CompletedOrderForReviewSerializer
 )
+from .pagination import ReviewPagination
+from fiverrBackend.utils.conditional import conditional_response, make_etag, set_validators
 from orders.models import Order
 from gigs.models import Gig
 
 
+def reviews_stamp(gig_slug):
+    """
+    Gig id plus the (denormalized) review count and latest review change,
+    in one query. Used as the validator for conditional GETs on a gig's
+    reviews; deletes change the count, edits move the timestamp.
+    """
+    stamp = (
+        Gig.objects.filter(slug=gig_slug)
+        .annotate(last_review=Max('reviews__updated_at'))
+        .values('id', 'review_count', 'last_review', 'created_at')
+        .first()
+    )
+    if stamp is None:
+        raise Http404
+    stamp['last_modified'] = stamp['last_review'] or stamp['created_at']
+    return stamp
+
+
 class CreateReviewView(generics.CreateAPIView):
     """Create a new review for a completed order"""
     serializer_class = ReviewSerializer
@@ -28,11 +49,25 @@ class GigReviewsListView(generics.ListAPIView):
     """List all reviews for a specific gig"""
     serializer_class = ReviewDisplaySerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = ReviewPagination
+
+    def list(self, request, *args, **kwargs):
+        self.gig_stamp = reviews_stamp(self.kwargs['gig_slug'])
+        etag = make_etag(
+            'reviews', request.get_host(), self.kwargs['gig_slug'],
+            self.gig_stamp['review_count'], self.gig_stamp['last_modified'],
+            sorted(request.query_params.lists()),
+        )
+        not_modified = conditional_response(
+            request, etag=etag, last_modified=self.gig_stamp['last_modified']
+        )
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag=etag, last_modified=self.gig_stamp['last_modified'])
 
     def get_queryset(self):
-        gig_slug = self.kwargs['gig_slug']
-        gig = get_object_or_404(Gig, slug=gig_slug)
-        return Review.objects.filter(gig=gig).select_related('reviewer')
+        return Review.objects.filter(gig_id=self.gig_stamp['id']).select_related('reviewer')
 
 
 class UserCompletedOrdersForReviewView(generics.ListAPIView):
@@ -51,9 +86,13 @@ class UserCompletedOrdersForReviewView(generics.ListAPIView):
 @permission_classes([permissions.AllowAny])
 def gig_review_stats(request, gig_slug):
     """Get review statistics for a gig"""
-    gig = get_object_or_404(Gig, slug=gig_slug)
+    stamp = reviews_stamp(gig_slug)
+    etag = make_etag('review-stats', gig_slug, stamp['review_count'], stamp['last_modified'])
+    not_modified = conditional_response(request, etag=etag, last_modified=stamp['last_modified'])
+    if not_modified is not None:
+        return not_modified
     
-    stats = Review.objects.filter(gig=gig).aggregate(
+    stats = Review.objects.filter(gig_id=stamp['id']).aggregate(
         average_rating=Avg('rating'),
         total_reviews=Count('id'),
         five_star=Count('id', filter=Q(rating=5)),
@@ -69,7 +108,7 @@ def gig_review_stats(request, gig_slug):
     else:
         stats['average_rating'] = 0
     
-    return Response(stats)
+    return set_validators(Response(stats), etag=etag, last_modified=stamp['last_modified'])
 
 
 @api_view(['GET'])
@@ -57,4 +57,26 @@ API.interceptors.request.use(config => {
   return config;
 });
 
+// One Idempotency-Key per user action (a click, not a request): resubmits and
+// retries of that action send the same key and the server replays the first result
+export const newIdempotencyKey = () => crypto.randomUUID();
+
+const RETRY_DELAYS_MS = [500, 1500];
+
+// POST with an Idempotency-Key, retrying with the same key when the request may
+// not have completed: no response, a 5xx, or a 409 while the first one is running
+export const postIdempotent = async (url, data, idempotencyKey) => {
+  const config = { headers: { "Idempotency-Key": idempotencyKey } };
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await API.post(url, data, config);
+    } catch (err) {
+      const status = err.response?.status;
+      const retryable = !err.response || status >= 500 || status === 409;
+      if (!retryable || attempt >= RETRY_DELAYS_MS.length) throw err;
+      await new Promise((resolve) => setTimeout(resolve, RETRY_DELAYS_MS[attempt]));
+    }
+  }
+};
+
 export default API;
@@ -24,3 +24,14 @@ export const markConversationRead = (conversationId) =>
 export const getUnreadCounts = () =>
   API.get("chat/conversations/unread_count/");
 
+
+// Push feed: message.created / conversation.read events for the user's conversations.
+// Returns the WebSocket; call .close() to unsubscribe.
+export const openChatSocket = (onEvent) => {
+  const api = new URL(API.defaults.baseURL, window.location.href);
+  const scheme = api.protocol === "https:" ? "wss:" : "ws:";
+  const token = encodeURIComponent(localStorage.getItem("access") || "");
+  const socket = new WebSocket(`${scheme}//${api.host}/ws/chat/?token=${token}`);
+  socket.onmessage = (e) => onEvent(JSON.parse(e.data));
+  return socket;
+};
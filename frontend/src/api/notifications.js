@@ -14,3 +14,8 @@ export const markNotificationRead = (id) => {
 export const markAllNotificationsRead = () => {
   return api.post("/notifications/mark-all-read/");
 };
+
+// Unread badge totals: { unread_messages, unread_notifications }
+export const getBadges = () => {
+  return api.get("/notifications/badges/");
+};
@@ -1,7 +1,8 @@
-import API from "./api";
+import API, { postIdempotent } from "./api";
 
 export const getOrders = () => API.get("orders/");
-export const createOrder = (data) => API.post("orders/", data);
+// idempotencyKey: from newIdempotencyKey(), once per "place order" action
+export const createOrder = (data, idempotencyKey) => postIdempotent("orders/", data, idempotencyKey);
 export const deliverOrder = (orderId) => API.post(`orders/${orderId}/deliver/`);
 export const rejectOrder = (orderId) => API.post(`orders/${orderId}/reject/`);
 export const acceptOrder = (orderId) => API.post(`orders/${orderId}/accept/`);
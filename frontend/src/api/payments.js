@@ -1,11 +1,17 @@
-import API from "./api";
+import API, { postIdempotent } from "./api";
 
-export const createCheckoutSession = (payload) => {
-  return API.post("payments/create-checkout-session/", {
-    ...payload,
-    success_url: "http://localhost:5173/payment-success?session_id={CHECKOUT_SESSION_ID}",
-    cancel_url: "http://localhost:5173/payment-cancel",
-  });
+// Pass the same idempotencyKey when paying for the same order again, so a
+// retry replays the stored session instead of creating another one at Stripe
+export const createCheckoutSession = (payload, idempotencyKey) => {
+  return postIdempotent(
+    "payments/create-checkout-session/",
+    {
+      ...payload,
+      success_url: "http://localhost:5173/payment-success?session_id={CHECKOUT_SESSION_ID}",
+      cancel_url: "http://localhost:5173/payment-cancel",
+    },
+    idempotencyKey
+  );
 };
 
 export const verifyPayment = (sessionId) =>
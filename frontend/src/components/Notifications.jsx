@@ -1,13 +1,24 @@
 import React, { useEffect, useState } from "react";
-import { getNotifications,markNotificationRead } from "../api/notifications";
+import { getBadges, getNotifications, markNotificationRead } from "../api/notifications";
 import "../styles/Notifications.css";
 
 const POLL_INTERVAL = 10000; // 10 seconds
 
 export default function Notifications() {
   const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
   const [open, setOpen] = useState(false);
 
+  // The bell only needs the maintained counter, not the notification list
+  const fetchBadge = async () => {
+    try {
+      const res = await getBadges();
+      setUnreadCount(res.data.unread_notifications);
+    } catch (err) {
+      console.error("Failed to load notification count", err);
+    }
+  };
+
   const fetchNotifications = async () => {
     try {
       const res = await getNotifications();
@@ -18,24 +29,29 @@ export default function Notifications() {
   };
 
   useEffect(() => {
-    fetchNotifications();
-    const interval = setInterval(fetchNotifications, POLL_INTERVAL);
+    fetchBadge();
+    const interval = setInterval(fetchBadge, POLL_INTERVAL);
     return () => clearInterval(interval);
   }, []);
 
+  // The list is loaded when the dropdown opens
+  useEffect(() => {
+    if (open) fetchNotifications();
+  }, [open]);
+
   const handleMarkRead = async (id) => {
+    const notif = notifications.find((n) => n.id === id);
     try {
       await markNotificationRead(id);
       setNotifications((prev) =>
         prev.map((n) => (n.id === id ? { ...n, is_read: true } : n))
       );
+      if (notif && !notif.is_read) setUnreadCount((count) => Math.max(count - 1, 0));
     } catch (err) {
       console.error("Failed to mark notification as read", err);
     }
   };
 
-  const unreadCount = notifications.filter((n) => !n.is_read).length;
-
   return (
     <div className="notifications">
       <button className="notif-bell" onClick={() => setOpen(!open)}>
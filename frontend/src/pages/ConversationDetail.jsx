@@ -6,6 +6,7 @@ import {
   listMessages,
   sendMessage,
   markConversationRead,
+  openChatSocket,
 } from "../api/chat";
 import "../styles/ConversationDetail.css";
 
@@ -25,6 +26,20 @@ export default function ConversationDetail() {
     markConversationRead(id);
   }, [id]);
 
+  // The sender's own message comes back both from the POST and over the socket
+  const appendMessage = (prev, message) =>
+    prev.some((m) => m.id === message.id) ? prev : [...prev, message];
+
+  // Live updates: messages from the other side arrive over the chat socket
+  useEffect(() => {
+    const socket = openChatSocket((event) => {
+      if (event.type !== "message.created" || event.conversation !== Number(id)) return;
+      setMessages((prev) => appendMessage(prev, event.message));
+      if (event.message.sender.username !== currentUser) markConversationRead(id);
+    });
+    return () => socket.close();
+  }, [id]);
+
   const fetchMessages = async () => {
     try {
       const res = await listMessages(id);
@@ -41,7 +56,7 @@ export default function ConversationDetail() {
     if (!newMsg.trim()) return;
     try {
       const res = await sendMessage(id, newMsg);
-      setMessages((prev) => [...prev, res.data]);
+      setMessages((prev) => appendMessage(prev, res.data));
       setNewMsg("");
     } catch (err) {
       console.error("Error sending message:", err);
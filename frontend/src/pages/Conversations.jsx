@@ -1,6 +1,6 @@
 // frontend/src/pages/Conversations.jsx
 import { useEffect, useState } from "react";
-import { listConversations } from "../api/chat";
+import { listConversations, openChatSocket } from "../api/chat";
 import { useNavigate } from "react-router-dom";
 import "../styles/Conversations.css"; // Import the stylesheet
 
@@ -9,7 +9,7 @@ export default function Conversations() {
   const navigate = useNavigate();
   const currentUser = localStorage.getItem("username"); // must be set at login!
 
-  useEffect(() => {
+  const loadConversations = () =>
     listConversations().then((res) => {
       const data = res.data.results || res.data;
 
@@ -23,6 +23,14 @@ export default function Conversations() {
 
       setConversations(unique);
     });
+
+  useEffect(() => {
+    loadConversations();
+    // Refresh the inbox when a message lands in any of the user's conversations
+    const socket = openChatSocket((event) => {
+      if (event.type === "message.created") loadConversations();
+    });
+    return () => socket.close();
   }, []);
 
   const getOtherParticipant = (participants) => {
@@ -1,8 +1,9 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { getGig, deleteGig } from "../api/gigs";
 import { createConversation } from "../api/chat";
 import { createOrder } from "../api/orders";
+import { newIdempotencyKey } from "../api/api";
 import { canReviewGig } from "../api/reviews";
 import ReviewsList from "./ReviewList";
 import "../styles/GigDetail.css";
@@ -15,6 +16,9 @@ export default function GigDetail() {
   const [canReview, setCanReview] = useState(false);
   const [availableOrders, setAvailableOrders] = useState([]);
   const [reviewsRefreshTrigger, setReviewsRefreshTrigger] = useState(0);
+  const [placingOrder, setPlacingOrder] = useState(false);
+  // Kept until the order is confirmed, so a second click after a lost response reuses it
+  const orderKey = useRef(null);
   const navigate = useNavigate();
 
   useEffect(() => {
@@ -99,15 +103,24 @@ export default function GigDetail() {
   };
 
   const handlePlaceOrder = async () => {
+    if (placingOrder) return;
     if (!window.confirm("Place an order for this gig?")) return;
 
+    orderKey.current ??= newIdempotencyKey();
+    setPlacingOrder(true);
     try {
-      const createRes = await createOrder({ gig_id: gig.id, instructions: "" });
+      const createRes = await createOrder({ gig_id: gig.id, instructions: "" }, orderKey.current);
+      orderKey.current = null;
       alert("Order placed successfully! You can track it in your Orders page.");
       navigate("/orders");
     } catch (err) {
       console.error(err);
+      // A definite rejection ends this attempt; otherwise the order may exist, keep the key
+      const status = err?.response?.status;
+      if (status && status < 500 && status !== 409) orderKey.current = null;
       alert(err?.response?.data?.detail || "Order placement failed");
+    } finally {
+      setPlacingOrder(false);
     }
   };
 
@@ -246,6 +259,7 @@ export default function GigDetail() {
                   <button
                     className="btn btn-primary btn-order"
                     onClick={handlePlaceOrder}
+                    disabled={placingOrder}
                   >
                     Place Order (${gig.price})
                   </button>
@@ -31,7 +31,7 @@ export default function ReviewFormWithList({
 
       try {
         const response = await getGigReviews(gigSlug);
-        setReviews(response.data);
+        setReviews(response.data.results || response.data);
       } catch (err) {
         setError("Failed to load reviews");
         setReviews([]);
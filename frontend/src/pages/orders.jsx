@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import {
   getOrders,
   deliverOrder,
@@ -6,6 +6,7 @@ import {
   acceptOrder,
 } from "../api/orders";
 import { createCheckoutSession } from "../api/payments";
+import { newIdempotencyKey } from "../api/api";
 import { loadStripe } from "@stripe/stripe-js";
 import "../styles/Orders.css";
 
@@ -14,12 +15,14 @@ const stripePromise = loadStripe(import.meta.env.VITE_STRIPE_PUBLIC_KEY);
 const Orders = () => {
   const [orders, setOrders] = useState([]);
   const [currentUser, setCurrentUser] = useState(null);
+  // One checkout key per order: paying again for the same order replays its session
+  const checkoutKeys = useRef({});
 
   useEffect(() => {
     const fetchOrders = async () => {
       try {
         const res = await getOrders();
-        setOrders(res.data);
+        setOrders(res.data.results || res.data);
 
         // If your API doesn't return current user, grab it from localStorage or auth context
         const user = JSON.parse(localStorage.getItem("user"));
@@ -53,7 +56,16 @@ const Orders = () => {
   };
 
   const handlePayment = async (orderId) => {
-    const res = await createCheckoutSession({ order_id: orderId });
+    checkoutKeys.current[orderId] ??= newIdempotencyKey();
+    let res;
+    try {
+      res = await createCheckoutSession({ order_id: orderId }, checkoutKeys.current[orderId]);
+    } catch (err) {
+      // A definite rejection (e.g. order not accepted yet) should not be replayed next time
+      const status = err?.response?.status;
+      if (status && status < 500 && status !== 409) delete checkoutKeys.current[orderId];
+      throw err;
+    }
     const stripe = await stripePromise;
     await stripe.redirectToCheckout({ sessionId: res.data.sessionId });
   };